@@ -1,11 +1,17 @@
 import os
 import re
+import heapq
+from bisect import bisect_left
 from colorama import init, Fore, Style
 from tabulate import tabulate
+from roaring import RoaringBitmap
 
 # Initialize colorama for colored terminal output
 init(autoreset=True)
 
+# Directories with at least this many documents use compressed bitmap postings
+BITMAP_MIN_DOCUMENTS = 4096
+
 # ------------------------- Noun Extraction and Preprocessing -------------------------
 
 
@@ -108,11 +114,13 @@ class LinkedList:
 
     def __init__(self):
         self.head = None
+        self._array = None
 
     def append(self, data):
         """Add a unique item to the linked list."""
         if not self.contains(data):
             new_node = Node(data)
+            self._array = None
             if not self.head:
                 self.head = new_node
                 return
@@ -135,6 +143,12 @@ class LinkedList:
         """Convert linked list to a standard Python list."""
         return [node.data for node in self.traverse()]
 
+    def to_array(self):
+        """Return a cached array snapshot of the list for random access."""
+        if self._array is None:
+            self._array = self.to_list()
+        return self._array
+
     def traverse(self):
         """Generator to traverse the linked list."""
         current = self.head
@@ -156,23 +170,367 @@ class LinkedList:
 
         return result
 
-# ------------------------- Non-Overlapped List Model -------------------------
+# ------------------------- Boolean Set Algebra -------------------------
 
 
-def build_inverted_index(directory_path):
+class QueryStats:
+    """Work counters collected while evaluating a single query."""
+
+    def __init__(self):
+        self.comparisons = 0
+        self.elements_touched = 0
+
+
+def gallop(array, target, low, stats):
     """
-    Build an inverted index using linked lists and noun extraction.
+    Find the first index at or after `low` whose value is not less than `target`.
+
+    Probes positions low+1, low+2, low+4, ... until the target is passed,
+    then binary searches the last gap (exponential search).
 
     Args:
-        directory_path (str): Path to directory containing text files
+        array (list): Sorted postings
+        target (str): Value to search for
+        low (int): Index to start searching from
+        stats (QueryStats): Counters to update
 
     Returns:
-        dict: Inverted index mapping terms to documents
+        int: Insertion index of the target
     """
-    inverted_index = {}
+    size = len(array)
+    if low >= size:
+        return size
+
+    stats.comparisons += 1
+    stats.elements_touched += 1
+    if array[low] >= target:
+        return low
+
+    bound = 1
+    while low + bound < size:
+        stats.comparisons += 1
+        stats.elements_touched += 1
+        if array[low + bound] >= target:
+            break
+        bound *= 2
+
+    start = low + bound // 2 + 1
+    end = min(low + bound, size)
+    steps = (end - start + 1).bit_length()
+    stats.comparisons += steps
+    stats.elements_touched += steps
+    return bisect_left(array, target, start, end)
+
+
+def union_postings(postings_lists, stats):
+    """
+    Union any number of sorted postings with a single k-way heap merge.
+
+    Args:
+        postings_lists (list): Sorted postings arrays
+        stats (QueryStats): Counters to update
+
+    Returns:
+        list: Sorted postings without duplicates
+    """
+    heap = [(postings[0], i, 0)
+            for i, postings in enumerate(postings_lists) if postings]
+    heapq.heapify(heap)
+
+    result = []
+    while heap:
+        value, i, position = heap[0]
+        stats.elements_touched += 1
+        stats.comparisons += len(heap).bit_length()
+
+        if not result or result[-1] != value:
+            result.append(value)
+
+        position += 1
+        postings = postings_lists[i]
+        if position < len(postings):
+            heapq.heapreplace(heap, (postings[position], i, position))
+        else:
+            heapq.heappop(heap)
+
+    return result
+
+
+def intersect_postings(postings_lists, stats):
+    """
+    Intersect sorted postings with galloping search, shortest list first.
+
+    Args:
+        postings_lists (list): Sorted postings arrays
+        stats (QueryStats): Counters to update
+
+    Returns:
+        list: Sorted postings present in every input
+    """
+    if not postings_lists:
+        return []
+
+    ordered = sorted(postings_lists, key=len)
+    result = ordered[0]
+    stats.elements_touched += len(result)
+
+    for postings in ordered[1:]:
+        if not result:
+            break
+        matches = []
+        position = 0
+        for value in result:
+            position = gallop(postings, value, position, stats)
+            if position == len(postings):
+                break
+            stats.comparisons += 1
+            if postings[position] == value:
+                matches.append(value)
+                position += 1
+        result = matches
+
+    return result
+
+
+def difference_postings(postings, excluded, stats):
+    """
+    Remove excluded documents from sorted postings using galloping search.
+
+    Args:
+        postings (list): Sorted postings to filter
+        excluded (list): Sorted postings to remove
+        stats (QueryStats): Counters to update
+
+    Returns:
+        list: Sorted postings not present in `excluded`
+    """
+    stats.elements_touched += len(postings)
+    result = []
+    position = 0
+    for value in postings:
+        position = gallop(excluded, value, position, stats)
+        stats.comparisons += 1
+        if position == len(excluded) or excluded[position] != value:
+            result.append(value)
+    return result
+
+
+def parse_query(query):
+    """
+    Parse a search query into a tree of Boolean operations.
+
+    Precedence from highest to lowest is NOT, AND, OR. Commas are treated
+    as OR so comma-separated queries keep their original meaning, and
+    parentheses can be used for grouping.
+
+    Args:
+        query (str): Raw search input
+
+    Returns:
+        tuple: Query tree of ("term", t), ("not", node), ("and", nodes)
+        or ("or", nodes), or None for an empty query
+
+    Raises:
+        ValueError: If the query is malformed
+    """
+    tokens = re.findall(r'\(|\)|,|[^\s(),]+', query.lower())
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        nodes = [parse_and()]
+        while peek() in ("or", ","):
+            advance()
+            nodes.append(parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def parse_and():
+        nodes = [parse_not()]
+        while peek() not in (None, "or", ",", ")"):
+            if peek() == "and":
+                advance()
+            nodes.append(parse_not())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def parse_not():
+        if peek() == "not":
+            advance()
+            return ("not", parse_not())
+        return parse_primary()
+
+    def parse_primary():
+        token = peek()
+        if token is None or token in ("and", "or", ",", ")"):
+            raise ValueError(f"Expected a search term but found {
+                             token or 'end of query'!r}")
+        advance()
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise ValueError("Missing closing parenthesis")
+            advance()
+            return node
+        return ("term", token)
+
+    if not tokens:
+        return None
+
+    tree = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {tokens[position]!r} in query")
+    return tree
+
+
+def query_terms(tree):
+    """Collect the search terms of a query tree in the order they appear."""
+    if tree[0] == "term":
+        return [tree[1]]
+    if tree[0] == "not":
+        return query_terms(tree[1])
+    terms = []
+    for node in tree[1]:
+        terms.extend(term for term in query_terms(node) if term not in terms)
+    return terms
+
+
+def evaluate_query(tree, inverted_index, stats, universe=None):
+    """
+    Evaluate a query tree against the inverted index.
+
+    OR nodes are merged in one k-way pass, AND nodes intersect their
+    positive operands shortest-first and then subtract negated ones, so
+    NOT is only materialized against every document when it stands alone.
+
+    Args:
+        tree (tuple): Query tree produced by parse_query
+        inverted_index (dict): Mapping of terms to LinkedList postings
+        stats (QueryStats): Counters to update
+        universe (list, optional): Sorted list of every document, which NOT
+            complements against. Defaults to the documents having a posting,
+            computed once per query
+
+    Returns:
+        list: Sorted matching documents
+    """
+    def all_documents():
+        nonlocal universe
+        if universe is None:
+            universe = union_postings(
+                [postings.to_array() for postings in inverted_index.values()], stats)
+        return universe
+
+    def evaluate(node):
+        kind = node[0]
+        if kind == "term":
+            postings = inverted_index.get(node[1])
+            return postings.to_array() if postings else []
+
+        if kind == "not":
+            excluded = evaluate(node[1])
+            return difference_postings(all_documents(), excluded, stats)
+
+        if kind == "or":
+            return union_postings([evaluate(child) for child in node[1]], stats)
+
+        positive = [child for child in node[1] if child[0] != "not"]
+        negative = [child[1] for child in node[1] if child[0] == "not"]
+
+        if positive:
+            result = intersect_postings([evaluate(child) for child in positive], stats)
+        else:
+            result = all_documents()
+
+        for child in negative:
+            if not result:
+                break
+            excluded = evaluate(child)
+            result = difference_postings(result, excluded, stats)
+
+        return result
+
+    return evaluate(tree)
+
+
+def evaluate_bitmap_query(tree, bitmap_index, document_count, stats):
+    """
+    Evaluate a query tree against bitmap postings.
+
+    Works like evaluate_query, but every operation runs chunk by chunk on
+    compressed bitmaps, so the counters measure containers rather than
+    individual documents.
 
-    # Process each text file
-    for filename in os.listdir(directory_path):
+    Args:
+        tree (tuple): Query tree produced by parse_query
+        bitmap_index (dict): Mapping of terms to RoaringBitmap postings
+        document_count (int): Number of documents, which NOT complements
+            against
+        stats (QueryStats): Counters to update
+
+    Returns:
+        RoaringBitmap: Ids of the matching documents
+    """
+    universe = None
+
+    def all_documents():
+        nonlocal universe
+        if universe is None:
+            universe = RoaringBitmap.full(document_count)
+        return universe
+
+    def combine(first, second, operation):
+        touched = len(first.containers) + len(second.containers)
+        stats.comparisons += touched
+        stats.elements_touched += touched
+        return operation(first, second)
+
+    def evaluate(node):
+        kind = node[0]
+        if kind == "term":
+            return bitmap_index.get(node[1], RoaringBitmap())
+
+        if kind == "not":
+            return combine(all_documents(), evaluate(node[1]), RoaringBitmap.__sub__)
+
+        if kind == "or":
+            operands = [evaluate(child) for child in node[1]]
+            result = operands[0]
+            for operand in operands[1:]:
+                result = combine(result, operand, RoaringBitmap.__or__)
+            return result
+
+        positive = sorted((evaluate(child) for child in node[1] if child[0] != "not"), key=len)
+        negative = [child[1] for child in node[1] if child[0] == "not"]
+
+        result = positive[0] if positive else all_documents()
+        for operand in positive[1:]:
+            result = combine(result, operand, RoaringBitmap.__and__)
+        for child in negative:
+            result = combine(result, evaluate(child), RoaringBitmap.__sub__)
+        return result
+
+    return evaluate(tree)
+
+# ------------------------- Non-Overlapped List Model -------------------------
+
+
+def read_document_nouns(directory_path):
+    """
+    Read every text file in name order and extract its nouns.
+
+    Args:
+        directory_path (str): Path to directory containing text files
+
+    Yields:
+        tuple: (filename, list of nouns) for each readable file
+    """
+    for filename in sorted(os.listdir(directory_path)):
         if filename.endswith(".txt"):
             file_path = os.path.join(directory_path, filename)
 
@@ -180,16 +538,8 @@ def build_inverted_index(directory_path):
                 with open(file_path, 'r', encoding='utf-8') as file:
                     content = file.read()
 
-                    # Extract nouns from the content
-                    nouns = tokenize_nouns(content)
-
-                    # Build inverted index
-                    for noun in nouns:
-                        if noun not in inverted_index:
-                            inverted_index[noun] = LinkedList()
-
-                        # Add document to the linked list if not already present
-                        inverted_index[noun].append(filename)
+                # Extract nouns from the content
+                nouns = tokenize_nouns(content)
 
                 # Preview file name with first 5 nouns
                 preview_nouns = nouns[:5]
@@ -199,8 +549,68 @@ def build_inverted_index(directory_path):
             except Exception as e:
                 print(f"{Fore.RED}Error processing {
                       filename}: {e}{Style.RESET_ALL}")
+                continue
+
+            yield filename, nouns
+
+
+def build_inverted_index(directory_path):
+    """
+    Build an inverted index using linked lists and noun extraction.
+
+    Files are processed in name order so every postings list is sorted.
+
+    Args:
+        directory_path (str): Path to directory containing text files
+
+    Returns:
+        tuple: (sorted list of every document, including those without
+        nouns, dict mapping terms to LinkedList postings)
+    """
+    documents = []
+    inverted_index = {}
+
+    for filename, nouns in read_document_nouns(directory_path):
+        documents.append(filename)
+
+        # Build inverted index
+        for noun in nouns:
+            if noun not in inverted_index:
+                inverted_index[noun] = LinkedList()
 
-    return inverted_index
+            # Add document to the linked list if not already present
+            inverted_index[noun].append(filename)
+
+    return documents, inverted_index
+
+
+def build_bitmap_index(directory_path):
+    """
+    Build an inverted index whose postings are compressed bitmaps.
+
+    Documents are numbered in name order, so frequent nouns cost a few
+    kilobytes instead of one linked list node per document.
+
+    Args:
+        directory_path (str): Path to directory containing text files
+
+    Returns:
+        tuple: (list of document names indexed by id,
+        dict mapping terms to RoaringBitmap postings)
+    """
+    documents = []
+    bitmap_index = {}
+
+    for filename, nouns in read_document_nouns(directory_path):
+        document_id = len(documents)
+        documents.append(filename)
+
+        for noun in nouns:
+            if noun not in bitmap_index:
+                bitmap_index[noun] = RoaringBitmap()
+            bitmap_index[noun].add(document_id)
+
+    return documents, bitmap_index
 
 
 def main():
@@ -225,44 +635,68 @@ def main():
 
         # Build inverted index
         print(f"{Fore.GREEN}Building inverted index...{Style.RESET_ALL}")
-        inverted_index = build_inverted_index(directory_path)
+        document_count = sum(1 for filename in os.listdir(directory_path)
+                             if filename.endswith(".txt"))
+        use_bitmaps = document_count >= BITMAP_MIN_DOCUMENTS
+        if use_bitmaps:
+            documents, inverted_index = build_bitmap_index(directory_path)
+        else:
+            documents, inverted_index = build_inverted_index(directory_path)
 
         # Search and retrieval loop
         while True:
             search_input = input(
-                f"\n{Fore.YELLOW}Enter search terms (comma-separated) or 'b' to go back: {Style.RESET_ALL}")
+                f"\n{Fore.YELLOW}Enter search terms (comma-separated or AND/OR/NOT) or 'b' to go back: {Style.RESET_ALL}")
 
             # Back to directory selection
             if search_input.lower() == 'b':
                 break
 
-            search_terms = [term.strip().lower()
-                            for term in search_input.split(',')]
+            try:
+                query_tree = parse_query(search_input)
+            except ValueError as e:
+                print(f"{Fore.RED}Invalid query: {e}{Style.RESET_ALL}")
+                continue
 
-            # Retrieve documents
-            results = {}
-            for term in search_terms:
-                results[term] = inverted_index.get(term, LinkedList())
+            if query_tree is None:
+                continue
 
-            # Compute non-overlapping documents
-            non_overlapping_docs = LinkedList()
-            for doc_list in results.values():
-                non_overlapping_docs = non_overlapping_docs.union(doc_list)
+            search_terms = query_terms(query_tree)
+
+            # Retrieve documents and evaluate the Boolean query
+            results = {}
+            stats = QueryStats()
+            if use_bitmaps:
+                for term in search_terms:
+                    results[term] = [documents[i] for i in inverted_index.get(
+                        term, RoaringBitmap())]
+                matches = evaluate_bitmap_query(
+                    query_tree, inverted_index, len(documents), stats)
+                non_overlapping_docs = [documents[i] for i in matches]
+            else:
+                for term in search_terms:
+                    results[term] = inverted_index.get(
+                        term, LinkedList()).to_list()
+                non_overlapping_docs = evaluate_query(
+                    query_tree, inverted_index, stats, documents)
 
             # Display results
             print(f"\n{Fore.CYAN}Search Results:{Style.RESET_ALL}")
 
             # Tabulate results
             table_data = [
-                [term, ", ".join(results[term].to_list())] for term in search_terms
+                [term, ", ".join(results[term])] for term in search_terms
             ]
             table_data.append(["Non-Overlapping Documents",
-                              ", ".join(non_overlapping_docs.to_list())])
+                              ", ".join(non_overlapping_docs)])
 
             print(tabulate(table_data, headers=[
                   f"{Fore.LIGHTCYAN_EX}Term{Style.RESET_ALL}",
                   f"{Fore.LIGHTCYAN_EX}Documents{Style.RESET_ALL}"], tablefmt="fancy_grid"))
 
+            print(f"{Fore.MAGENTA}Comparisons: {stats.comparisons}, Elements touched: {
+                  stats.elements_touched}{Style.RESET_ALL}")
+
 
 # Entry point of the program
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import os
 from colorama import init, Fore, Style
 from tabulate import tabulate
+from roaring import RoaringBitmap
 
 init(autoreset=True)
 
@@ -50,34 +51,44 @@ def tokenize_nouns(content):
 
 class Graph:
     def __init__(self):
+        # Nodes are numbered so adjacency can be stored as compressed bitmaps
+        self.node_ids = {}
+        self.nodes = []
         self.adjacency_list = {}
 
     def add_node(self, node):
         """Adds a node to the graph."""
         if node not in self.adjacency_list:
-            self.adjacency_list[node] = set()
+            self.node_ids[node] = len(self.nodes)
+            self.nodes.append(node)
+            self.adjacency_list[node] = RoaringBitmap()
 
     def add_edge(self, node1, node2):
         """Creates an undirected edge between two nodes."""
         self.add_node(node1)
         self.add_node(node2)
-        self.adjacency_list[node1].add(node2)
-        self.adjacency_list[node2].add(node1)
+        self.adjacency_list[node1].add(self.node_ids[node2])
+        self.adjacency_list[node2].add(self.node_ids[node1])
+
+    def get_neighbor_ids(self, node):
+        """Returns the bitmap of neighbor ids of a node."""
+        return self.adjacency_list.get(node, RoaringBitmap())
 
     def get_neighbors(self, node):
         """Returns all neighbors of a node."""
-        return self.adjacency_list.get(node, set())
+        return {self.nodes[i] for i in self.get_neighbor_ids(node)}
 
     def bfs(self, start_node):
         """Performs BFS to find all connected nodes."""
-        visited = set()
-        queue = [start_node]
+        visited = RoaringBitmap()
+        queue = [self.node_ids[start_node]]
         connected_nodes = []
 
         while queue:
-            node = queue.pop(0)
-            if node not in visited:
-                visited.add(node)
+            node_id = queue.pop(0)
+            if node_id not in visited:
+                visited.add(node_id)
+                node = self.nodes[node_id]
                 connected_nodes.append(node)
                 queue.extend(self.adjacency_list[node] - visited)
 
@@ -86,7 +97,7 @@ class Graph:
     def display_graph(self):
         """Prints the adjacency list representation of the graph."""
         for node, neighbors in self.adjacency_list.items():
-            print(f"{node}: {', '.join(neighbors)}")
+            print(f"{node}: {', '.join(self.nodes[i] for i in neighbors)}")
 
 
 # ------------------------- Document-Node Index Construction -------------------------
@@ -136,13 +147,13 @@ def find_proximal_nodes(query, graph):
 
 
 def retrieve_connected_documents(graph, proximal_nodes):
-    connected_docs = set()
-
+    # Union the neighbor bitmaps first so only the result is materialized
+    connected_ids = RoaringBitmap()
     for node in proximal_nodes:
-        neighbors = graph.get_neighbors(node)
-        for neighbor in neighbors:
-            if neighbor.endswith(".txt"):
-                connected_docs.add(neighbor)
+        connected_ids = connected_ids | graph.get_neighbor_ids(node)
+
+    connected_docs = {graph.nodes[i] for i in connected_ids
+                      if graph.nodes[i].endswith(".txt")}
 
     # If no documents are connected, check if the full query is a node
     if not connected_docs and any(node in graph.adjacency_list for node in proximal_nodes):
@@ -161,8 +172,8 @@ def display_results(graph, connected_docs, proximal_nodes):
     if connected_docs:
         # Filter connected nouns to include only proximal nodes
         table = [
-            [doc, ", ".join([noun for noun in graph.get_neighbors(
-                doc) if noun in proximal_nodes])]
+            [doc, ", ".join([noun for noun in proximal_nodes
+                             if graph.node_ids[noun] in graph.get_neighbor_ids(doc)])]
             for doc in connected_docs
         ]
         print(tabulate(
@@ -0,0 +1,214 @@
+from array import array
+from bisect import bisect_left
+
+# ------------------------- Roaring Bitmap Containers -------------------------
+
+# Chunks holding more ids than this are stored as bitmaps instead of arrays
+ARRAY_CONTAINER_LIMIT = 4096
+CHUNK_SIZE = 1 << 16
+CHUNK_MASK = CHUNK_SIZE - 1
+BITMAP_BYTES = CHUNK_SIZE // 8
+
+# Positions of the set bits for every byte value
+BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1)
+             for value in range(256)]
+
+
+def array_to_bitmap(values):
+    """Convert a sorted array container into a 65536-bit integer."""
+    buffer = bytearray(BITMAP_BYTES)
+    for low in values:
+        buffer[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def bitmap_to_array(bits):
+    """Convert a bitmap container into a sorted array('H') container."""
+    values = array("H")
+    for index, byte in enumerate(bits.to_bytes(BITMAP_BYTES, "little")):
+        if byte:
+            base = index << 3
+            values.extend(base + bit for bit in BYTE_BITS[byte])
+    return values
+
+
+def cardinality(container):
+    """Count the ids held by a container."""
+    if isinstance(container, int):
+        return container.bit_count()
+    return len(container)
+
+
+def normalize(container):
+    """
+    Pick the cheaper representation for a container.
+
+    Returns:
+        array | int | None: Array when sparse, bitmap when dense, None when empty
+    """
+    if isinstance(container, int):
+        count = container.bit_count()
+        if count == 0:
+            return None
+        if count <= ARRAY_CONTAINER_LIMIT:
+            return bitmap_to_array(container)
+        return container
+
+    if not container:
+        return None
+    if len(container) > ARRAY_CONTAINER_LIMIT:
+        return array_to_bitmap(container)
+    return container
+
+
+def filter_array(values, bits, keep):
+    """Keep the array entries whose bit in `bits` equals `keep`."""
+    data = bits.to_bytes(BITMAP_BYTES, "little")
+    return array("H", [low for low in values
+                       if bool(data[low >> 3] >> (low & 7) & 1) == keep])
+
+
+def union_containers(first, second):
+    """Union two containers of the same chunk."""
+    if isinstance(first, array) and isinstance(second, array):
+        return normalize(array("H", sorted(set(first).union(second))))
+    if not isinstance(first, int):
+        first = array_to_bitmap(first)
+    if not isinstance(second, int):
+        second = array_to_bitmap(second)
+    return normalize(first | second)
+
+
+def intersect_containers(first, second):
+    """Intersect two containers of the same chunk."""
+    if isinstance(first, array) and isinstance(second, array):
+        return normalize(array("H", sorted(set(first).intersection(second))))
+    if isinstance(first, array):
+        return normalize(filter_array(first, second, True))
+    if isinstance(second, array):
+        return normalize(filter_array(second, first, True))
+    return normalize(first & second)
+
+
+def difference_containers(first, second):
+    """Remove the ids of `second` from `first` within one chunk."""
+    if isinstance(first, array) and isinstance(second, array):
+        return normalize(array("H", sorted(set(first).difference(second))))
+    if isinstance(first, array):
+        return normalize(filter_array(first, second, False))
+    if isinstance(second, array):
+        second = array_to_bitmap(second)
+    return normalize(first & ~second)
+
+
+# ------------------------- Roaring Bitmap -------------------------
+
+
+class RoaringBitmap:
+    """
+    Compressed set of non-negative integers such as document ids.
+
+    Ids are grouped into chunks of 65536 by their high bits. A sparse chunk
+    is a sorted array('H') of 2 bytes per id, and a chunk with more than
+    4096 ids becomes a 65536-bit integer, so no chunk exceeds 8 KB.
+    """
+
+    def __init__(self, values=()):
+        self.containers = {}
+        for value in values:
+            self.add(value)
+
+    @classmethod
+    def full(cls, size):
+        """Create a bitmap holding every id in range(size)."""
+        bitmap = cls()
+        for high in range(0, (size + CHUNK_MASK) >> 16):
+            count = min(size - (high << 16), CHUNK_SIZE)
+            bitmap.containers[high] = normalize((1 << count) - 1)
+        return bitmap
+
+    def add(self, value):
+        """Add an id to the bitmap."""
+        high, low = value >> 16, value & CHUNK_MASK
+        container = self.containers.get(high)
+
+        if container is None:
+            self.containers[high] = array("H", [low])
+        elif isinstance(container, int):
+            self.containers[high] = container | (1 << low)
+        else:
+            position = bisect_left(container, low)
+            if position == len(container) or container[position] != low:
+                container.insert(position, low)
+                if len(container) > ARRAY_CONTAINER_LIMIT:
+                    self.containers[high] = array_to_bitmap(container)
+
+    def __contains__(self, value):
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & CHUNK_MASK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        position = bisect_left(container, low)
+        return position < len(container) and container[position] == low
+
+    def __len__(self):
+        return sum(cardinality(container) for container in self.containers.values())
+
+    def __iter__(self):
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            if isinstance(container, int):
+                container = bitmap_to_array(container)
+            base = high << 16
+            for low in container:
+                yield base + low
+
+    def __eq__(self, other):
+        if not isinstance(other, RoaringBitmap):
+            return NotImplemented
+        return self.containers == other.containers
+
+    def __repr__(self):
+        return f"RoaringBitmap({len(self)} ids, {len(self.containers)} chunks)"
+
+    def _combine(self, other, operation, keys):
+        result = RoaringBitmap()
+        for high in keys:
+            container = operation(self.containers[high], other.containers[high])
+            if container is not None:
+                result.containers[high] = container
+        return result
+
+    def __or__(self, other):
+        result = RoaringBitmap()
+        for high in self.containers.keys() | other.containers.keys():
+            first = self.containers.get(high)
+            second = other.containers.get(high)
+            if first is None or second is None:
+                container = first if second is None else second
+                result.containers[high] = (
+                    container if isinstance(container, int) else array("H", container))
+            else:
+                result.containers[high] = union_containers(first, second)
+        return result
+
+    def __and__(self, other):
+        keys = self.containers.keys() & other.containers.keys()
+        return self._combine(other, intersect_containers, keys)
+
+    def __sub__(self, other):
+        result = self._combine(
+            other, difference_containers, self.containers.keys() & other.containers.keys())
+        for high in self.containers.keys() - other.containers.keys():
+            container = self.containers[high]
+            result.containers[high] = (
+                container if isinstance(container, int) else array("H", container))
+        return result
+
+    def nbytes(self):
+        """Approximate payload size of the containers in bytes."""
+        return sum(BITMAP_BYTES if isinstance(container, int)
+                   else container.itemsize * len(container)
+                   for container in self.containers.values())
@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from non_overlaped import (QueryStats, build_bitmap_index, build_inverted_index,
+                           evaluate_bitmap_query, evaluate_query, parse_query)
+
+NOUNS = ["ai", "cloud", "network", "database", "software", "hardware"]
+
+
+class BackendAgreementTest(unittest.TestCase):
+    """The linked-list and bitmap backends answer every query alike."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        rng = random.Random(7)
+        for i in range(40):
+            # Every fifth document has no nouns at all
+            words = [] if i % 5 == 0 else rng.sample(NOUNS, rng.randint(1, 3))
+            with open(os.path.join(self.directory.name, f"doc{i:02}.txt"), "w") as file:
+                file.write(" ".join(words + ["and", "the"]))
+
+        with redirect_stdout(StringIO()):
+            self.documents, self.inverted_index = build_inverted_index(self.directory.name)
+            self.bitmap_documents, self.bitmap_index = build_bitmap_index(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_queries_match(self):
+        self.assertEqual(self.documents, self.bitmap_documents)
+        queries = ["ai", "not ai", "not ai and not cloud", "ai or not cloud",
+                   "not (ai or network)", "cloud and not (software or ai)",
+                   "ai, cloud", "not missing"]
+        for query in queries:
+            tree = parse_query(query)
+            linked = evaluate_query(tree, self.inverted_index, QueryStats(), self.documents)
+            bitmap = evaluate_bitmap_query(tree, self.bitmap_index,
+                                           len(self.bitmap_documents), QueryStats())
+            with self.subTest(query=query):
+                self.assertEqual(linked, [self.bitmap_documents[i] for i in bitmap])
+
+    def test_not_includes_documents_without_nouns(self):
+        tree = parse_query("not ai")
+        matches = evaluate_query(tree, self.inverted_index, QueryStats(), self.documents)
+        self.assertIn("doc00.txt", matches)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,37 +1,397 @@
+import hashlib
+import json
+import mmap
+import os
 import tkinter as tk
+from collections import deque
+from collections.abc import Mapping
+from functools import lru_cache
 from tkinter import messagebox
 
+# Book files: chapter text and the table of chapter offsets and links
+BOOK_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+BOOK_TEXT_PATH = os.path.join(BOOK_DIRECTORY, "ebook.txt")
+BOOK_TOC_PATH = os.path.join(BOOK_DIRECTORY, "ebook.toc.json")
+
+# Trigram index of the chapter text, saved next to the book
+TRIGRAM_INDEX_PATH = os.path.join(BOOK_DIRECTORY, "ebook.trigrams.json")
+
+# Number of rendered chapters kept for Back and repeated navigation
+RENDER_CACHE_SIZE = 32
+
+# Number of breadth-first search trees kept for routing
+ROUTE_CACHE_SIZE = 64
+
+
+class Book(Mapping):
+    """
+    E-book whose chapter text stays in a memory-mapped file.
+
+    The table of contents stores each chapter's byte offset, byte length and
+    links, so a chapter's text is only decoded when it is looked up.
+    """
+
+    def __init__(self, text_path, toc_path):
+        with open(toc_path, "r", encoding="utf-8") as file:
+            self.toc = {entry["name"]: entry for entry in json.load(file)}
+
+        with open(text_path, "rb") as file:
+            if os.path.getsize(text_path):
+                self.text = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.text = b""
+
+    def __getitem__(self, chapter_name):
+        entry = self.toc[chapter_name]
+        start = entry["offset"]
+        content = self.text[start:start + entry["length"]].decode("utf-8")
+        return {"content": content, "links": entry["links"]}
+
+    def __iter__(self):
+        return iter(self.toc)
+
+    def __len__(self):
+        return len(self.toc)
+
+
 # Content structure
-ebook_content = {
-    "Chapter 1: A Scandal in Bohemia": {
-        "content": (
-            "To Sherlock Holmes she is always the woman. I have seldom heard him mention her under any other name.\n\n"
-            "Click here to go to [Chapter 2: The Red-Headed League]."
-        ),
-        "links": {"[Chapter 2: The Red-Headed League]": "Chapter 2: The Red-Headed League"},
-    },
-    "Chapter 2: The Red-Headed League": {
-        "content": (
-            "I had called upon my friend Sherlock Holmes one day in the autumn of last year and found him in deep conversation.\n\n"
-            "Click here to go to [Chapter 1: A Scandal in Bohemia] or [Chapter 3: A Case of Identity]."
-        ),
-        "links": {
-            "[Chapter 1: A Scandal in Bohemia]": "Chapter 1: A Scandal in Bohemia",
-            "[Chapter 3: A Case of Identity]": "Chapter 3: A Case of Identity",
-        },
-    },
-    "Chapter 3: A Case of Identity": {
-        "content": (
-            "My dear fellow,’ said Sherlock Holmes as we sat on either side of the fire in his lodgings at Baker Street.\n\n"
-            "Go back to [Chapter 2: The Red-Headed League]."
-        ),
-        "links": {"[Chapter 2: The Red-Headed League]": "Chapter 2: The Red-Headed League"},
-    },
-}
+ebook_content = Book(BOOK_TEXT_PATH, BOOK_TOC_PATH)
+
+# Trigram index functions
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of the text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def book_fingerprint(book):
+    """Hash the chapter table and book text so a stale saved index is detected."""
+    digest = hashlib.sha1()
+    digest.update(json.dumps(list(book.toc.values())).encode("utf-8"))
+    digest.update(book.text)
+    return digest.hexdigest()
+
+
+def build_trigram_index(book):
+    """
+    Map every lowercased trigram of the book to the ids of the chapters containing it.
+    """
+    chapters = list(book.keys())
+    postings = {}
+    for chapter_id, chapter_name in enumerate(chapters):
+        for gram in trigrams(book[chapter_name]["content"].lower()):
+            postings.setdefault(gram, []).append(chapter_id)
+
+    return {"fingerprint": book_fingerprint(book), "chapters": chapters, "postings": postings}
+
+
+def load_trigram_index(book, path=TRIGRAM_INDEX_PATH):
+    """
+    Load the saved trigram index, rebuilding and saving it if missing or stale.
+    """
+    fingerprint = book_fingerprint(book)
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            index = json.load(file)
+        if index.get("fingerprint") == fingerprint:
+            return index
+    except (OSError, ValueError):
+        pass
+
+    index = build_trigram_index(book)
+    try:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(index, file)
+    except OSError:
+        pass  # The in-memory index still works without a saved copy
+    return index
+
+
+def find_chapters(keyword, book, index):
+    """
+    Find the chapters containing the keyword, case-insensitively.
+
+    Only chapters holding every trigram of the keyword are scanned, so the
+    cost depends on the candidates rather than the size of the book.
+    Keywords shorter than three characters fall back to a full scan.
+    """
+    keyword = keyword.lower()
+    postings = index["postings"]
+
+    candidate_ids = None
+    for gram in sorted(trigrams(keyword), key=lambda g: len(postings.get(g, ()))):
+        chapter_ids = postings.get(gram)
+        if not chapter_ids:
+            return []
+        candidate_ids = set(chapter_ids) if candidate_ids is None else candidate_ids.intersection(
+            chapter_ids)
+
+    if candidate_ids is None:
+        candidates = index["chapters"]
+    else:
+        candidates = [index["chapters"][i] for i in sorted(candidate_ids)]
+
+    return [chapter for chapter in candidates
+            if keyword in book[chapter]["content"].lower()]
+
+
+trigram_index = load_trigram_index(ebook_content)
+
+# Multi-pattern matching
+
+
+class AhoCorasick:
+    """
+    Automaton that finds every occurrence of several patterns in one pass over a text.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.transitions = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+
+        # Build the trie of patterns
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.outputs.append([])
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            if pattern:
+                self.outputs[state].append(pattern_id)
+
+        # Link every state to its longest proper suffix in the trie
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.outputs[next_state] = (
+                    self.outputs[next_state] + self.outputs[self.fail[next_state]])
+
+    def find_all(self, text):
+        """
+        Yield (start, end, pattern_id) for every match, including overlapping ones.
+        """
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            for pattern_id in outputs[state]:
+                end = position + 1
+                yield end - len(self.patterns[pattern_id]), end, pattern_id
+
+
+def split_keywords(text):
+    """Split comma-separated search input into its keywords."""
+    return [keyword.strip() for keyword in text.split(",") if keyword.strip()]
+
+
+def fold_case(text):
+    """
+    Lowercase text one character per character, so that offsets into the
+    result are offsets into the text: "İ", which lowercases to "i" plus a
+    combining dot, becomes "i".
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(char.lower()[0] for char in text)
+
+
+def keyword_ranges(content, keywords):
+    """
+    Find the merged character ranges of all keyword matches, case-insensitively.
+
+    Returns:
+        list: Sorted, non-overlapping (start, end) ranges
+    """
+    automaton = AhoCorasick({fold_case(keyword) for keyword in keywords})
+    ranges = []
+    for start, end, _ in sorted(automaton.find_all(fold_case(content))):
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(end, ranges[-1][1]))
+        else:
+            ranges.append((start, end))
+    return ranges
+
+# Rendering functions
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_chapter(chapter_name):
+    """
+    Materialize a chapter and precompute the character ranges of its links.
+
+    Returns:
+        tuple: (content, tuple of (link_text, target_chapter, start, end))
+    """
+    chapter = ebook_content[chapter_name]
+    content = chapter["content"]
+    links = list(chapter["links"].items())
+
+    # Keep the first occurrence of each link, found in a single pass
+    link_starts = {}
+    for start, _, link_id in AhoCorasick(link_text for link_text, _ in links).find_all(content):
+        link_starts.setdefault(link_id, start)
+
+    link_ranges = [
+        (link_text, target_chapter, link_starts[link_id], link_starts[link_id] + len(link_text))
+        for link_id, (link_text, target_chapter) in enumerate(links) if link_id in link_starts
+    ]
+
+    return content, tuple(link_ranges)
+
+# Link graph
+
+
+class LinkGraph:
+    """
+    Chapter link graph compiled once from the book's table of contents.
+
+    Keeps forward links and backlinks as adjacency lists of chapter ids,
+    caches breadth-first search trees for routing, and precomputes the
+    reachability of every strongly connected component.
+    """
+
+    def __init__(self, book):
+        self.chapters = list(book.keys())
+        self.chapter_ids = {name: i for i, name in enumerate(self.chapters)}
+        self.links = [[] for _ in self.chapters]
+        self.backlinks = [[] for _ in self.chapters]
+
+        for source, entry in book.toc.items():
+            source_id = self.chapter_ids[source]
+            for target in dict.fromkeys(entry["links"].values()):
+                target_id = self.chapter_ids.get(target)
+                if target_id is not None:
+                    self.links[source_id].append(target_id)
+                    self.backlinks[target_id].append(source_id)
+
+        self.bfs_tree = lru_cache(maxsize=ROUTE_CACHE_SIZE)(self._bfs_tree)
+        self._build_reachability()
+
+    def _build_reachability(self):
+        """
+        Find strongly connected components (iterative Tarjan) and the set of
+        components reachable from each, stored as integer bitsets.
+        """
+        count = len(self.chapters)
+        index = [-1] * count
+        lowlink = [0] * count
+        on_stack = [False] * count
+        stack = []
+        self.component = [-1] * count
+        self.reach = []
+        next_index = 0
+
+        for root_id in range(count):
+            if index[root_id] != -1:
+                continue
+            work = [(root_id, 0)]
+            while work:
+                node, edge = work.pop()
+                if edge == 0:
+                    index[node] = lowlink[node] = next_index
+                    next_index += 1
+                    stack.append(node)
+                    on_stack[node] = True
+
+                # Resume scanning the links of this node
+                descended = False
+                neighbors = self.links[node]
+                while edge < len(neighbors):
+                    neighbor = neighbors[edge]
+                    edge += 1
+                    if index[neighbor] == -1:
+                        work.append((node, edge))
+                        work.append((neighbor, 0))
+                        descended = True
+                        break
+                    if on_stack[neighbor]:
+                        lowlink[node] = min(lowlink[node], index[neighbor])
+                if descended:
+                    continue
+
+                if lowlink[node] == index[node]:
+                    # Components finish in reverse topological order, so every
+                    # component this one links to already has its reach set
+                    component_id = len(self.reach)
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        self.component[member] = component_id
+                        members.append(member)
+                        if member == node:
+                            break
+                    reach = 1 << component_id
+                    for member in members:
+                        for neighbor in self.links[member]:
+                            if self.component[neighbor] != component_id:
+                                reach |= self.reach[self.component[neighbor]]
+                    self.reach.append(reach)
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    def _bfs_tree(self, source_id):
+        """Return the BFS parent of every chapter reachable from the source."""
+        parents = {source_id: None}
+        queue = deque([source_id])
+        while queue:
+            node = queue.popleft()
+            for neighbor in self.links[node]:
+                if neighbor not in parents:
+                    parents[neighbor] = node
+                    queue.append(neighbor)
+        return parents
+
+    def links_here(self, chapter_name):
+        """Return the chapters that link to the given chapter."""
+        return [self.chapters[i] for i in self.backlinks[self.chapter_ids[chapter_name]]]
+
+    def reachable(self, source, target):
+        """Check in constant time whether the target can be reached by following links."""
+        source_component = self.component[self.chapter_ids[source]]
+        target_component = self.component[self.chapter_ids[target]]
+        return bool(self.reach[source_component] >> target_component & 1)
+
+    def shortest_path(self, source, target):
+        """
+        Return the shortest chain of chapters from source to target, or None if unreachable.
+        """
+        if not self.reachable(source, target):
+            return None
+
+        parents = self.bfs_tree(self.chapter_ids[source])
+        path = []
+        node = self.chapter_ids[target]
+        while node is not None:
+            path.append(self.chapters[node])
+            node = parents[node]
+        return path[::-1]
+
+
+link_graph = LinkGraph(ebook_content)
+
 
 # Global variables for navigation and visited tracking
 visited_nodes = []
 visited_links = set()
+bound_link_tags = set()
 
 # Function to display content for a specific chapter
 
@@ -44,36 +404,35 @@ def display_content(chapter_name, keyword=None):
     text_widget.delete("1.0", tk.END)
 
     # Add content to the text widget
-    chapter = ebook_content[chapter_name]
-    content = chapter["content"]
+    content, link_ranges = render_chapter(chapter_name)
     text_widget.insert(tk.END, content)
 
-    # Highlight keywords if provided
-    if keyword:
-        start = "1.0"
-        while True:
-            start = text_widget.search(
-                keyword, start, stopindex=tk.END, nocase=True)
-            if not start:
-                break
-            end = f"{start}+{len(keyword)}c"
-            text_widget.tag_add("highlight", start, end)
-            text_widget.tag_config("highlight", background="yellow")
-            start = end
-
-    # Highlight and bind links
-    for link_text, target_chapter in chapter["links"].items():
-        start_index = text_widget.search(link_text, "1.0", tk.END)
-        if start_index:
-            end_index = f"{start_index}+{len(link_text)}c"
-            text_widget.tag_add(link_text, start_index, end_index)
-
-            # Set color for visited and unvisited links
-            link_color = "purple" if target_chapter in visited_links else "blue"
-            text_widget.tag_config(
-                link_text, foreground=link_color, underline=True)
-            text_widget.tag_bind(link_text, "<Button-1>",
+    # Highlight keywords if provided, adding every range in one call
+    keywords = split_keywords(keyword) if keyword else []
+    if keywords:
+        highlight_indices = []
+        for start, end in keyword_ranges(content, keywords):
+            highlight_indices.extend((f"1.0+{start}c", f"1.0+{end}c"))
+        if highlight_indices:
+            text_widget.tag_add("highlight", *highlight_indices)
+
+    # Highlight and bind links using the precomputed ranges
+    chapter_id = link_graph.chapter_ids[chapter_name]
+    for link_id, (link_text, target_chapter, start, end) in enumerate(link_ranges):
+        # One tag per link of each chapter, as chapters reuse link texts
+        # with different targets
+        link_tag = f"link-{chapter_id}-{link_id}"
+        text_widget.tag_add(link_tag, f"1.0+{start}c", f"1.0+{end}c")
+
+        # Style visited and unvisited links with the shared tags
+        style_tag = "visited_link" if target_chapter in visited_links else "link"
+        text_widget.tag_add(style_tag, f"1.0+{start}c", f"1.0+{end}c")
+
+        # Tags outlive the text, so each link only needs binding once
+        if link_tag not in bound_link_tags:
+            text_widget.tag_bind(link_tag, "<Button-1>",
                                  lambda e, t=target_chapter: navigate_to(t))
+            bound_link_tags.add(link_tag)
 
     # Disable editing
     text_widget.config(state=tk.DISABLED)
@@ -112,17 +471,63 @@ def search_keyword():
         messagebox.showwarning("Search", "Please enter a keyword to search.")
         return
 
+    search_results_label.config(text="Search Results:")
     search_results.delete(0, tk.END)  # Clear previous results
-    for chapter, details in ebook_content.items():
-        if keyword.lower() in details["content"].lower():
-            search_results.insert(tk.END, chapter)
+
+    # Comma-separated keywords match chapters containing any of them
+    matches = dict.fromkeys(
+        chapter for term in split_keywords(keyword)
+        for chapter in find_chapters(term, ebook_content, trigram_index))
+    for chapter in matches:
+        search_results.insert(tk.END, chapter)
 
     if not search_results.size():
         messagebox.showinfo("Search", f"No results found for '{keyword}'.")
 
 
+def show_chapter_list(title, chapters):
+    """Replace the search results list with the given chapters."""
+    search_results_label.config(text=title)
+    search_results.delete(0, tk.END)
+    for chapter in chapters:
+        search_results.insert(tk.END, chapter)
+
+
+def show_links_here():
+    current_chapter = visited_nodes[-1]
+    backlinks = link_graph.links_here(current_chapter)
+    if not backlinks:
+        messagebox.showinfo("Links", f"No chapters link to '{current_chapter}'.")
+        return
+    show_chapter_list("Links Here:", backlinks)
+
+
+def route_to_chapter():
+    target_text = search_entry.get().strip().lower()
+    if not target_text:
+        messagebox.showwarning(
+            "Route", "Enter part of a chapter title in the search box.")
+        return
+
+    target_chapter = next(
+        (chapter for chapter in link_graph.chapters if target_text in chapter.lower()), None)
+    if target_chapter is None:
+        messagebox.showinfo("Route", f"No chapter title matches '{target_text}'.")
+        return
+
+    path = link_graph.shortest_path(visited_nodes[-1], target_chapter)
+    if path is None:
+        messagebox.showinfo(
+            "Route", f"'{target_chapter}' cannot be reached by following links.")
+        return
+    show_chapter_list("Route:", path)
+
+
 def go_to_search_result(event):
-    selected_chapter = search_results.get(search_results.curselection())
+    selection = search_results.curselection()
+    if not selection:
+        return
+    selected_chapter = search_results.get(selection)
     display_content(selected_chapter, keyword=search_entry.get().strip())
 
 
@@ -163,6 +568,9 @@ search_button.pack(side=tk.LEFT, padx=5)
 # Text widget for content
 text_widget = tk.Text(root, wrap=tk.WORD, font=("Arial", 12), bg="#ffffcc")
 text_widget.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+text_widget.tag_config("highlight", background="yellow")
+text_widget.tag_config("link", foreground="blue", underline=True)
+text_widget.tag_config("visited_link", foreground="purple", underline=True)
 
 # Search results list
 search_results_frame = tk.Frame(root, bg="#f2f2f2")
@@ -186,12 +594,20 @@ back_button = tk.Button(nav_frame, text="Back", command=go_back,
                         bg="#4d79ff", fg="white", font=("Arial", 10))
 back_button.pack(side=tk.LEFT, padx=5, pady=5)
 
+links_here_button = tk.Button(nav_frame, text="What Links Here", command=show_links_here,
+                              bg="#4d79ff", fg="white", font=("Arial", 10))
+links_here_button.pack(side=tk.LEFT, padx=5, pady=5)
+
+route_button = tk.Button(nav_frame, text="Route To", command=route_to_chapter,
+                         bg="#4d79ff", fg="white", font=("Arial", 10))
+route_button.pack(side=tk.LEFT, padx=5, pady=5)
+
 exit_button = tk.Button(nav_frame, text="Exit", command=root.quit,
                         bg="#ff4d4d", fg="white", font=("Arial", 10))
 exit_button.pack(side=tk.RIGHT, padx=5, pady=5)
 
 # Load the first chapter initially
-display_content("Chapter 1: A Scandal in Bohemia")
+display_content(next(iter(ebook_content)))
 
 # Run the application
 root.mainloop()
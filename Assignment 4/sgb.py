@@ -1,85 +1,360 @@
+import csv
+import json
+import os
+import re
+import sys
 import tkinter as tk
+from array import array
+from bisect import bisect_left
 from tkinter import ttk
 
-# Udemy-like course hierarchy with descriptions
-udemy_content = {
-    "Programming & Development": {
-        "Web Development": {
-            "HTML & CSS": [
-                {"name": "HTML Basics",
-                    "description": "Learn the foundation of web development with HTML."},
-                {"name": "Advanced CSS",
-                    "description": "Master CSS techniques for responsive and modern web design."}
-            ],
-            "JavaScript": [
-                {"name": "Introduction to JavaScript",
-                    "description": "Understand the basics of JavaScript programming."},
-                {"name": "ES6 Features",
-                    "description": "Explore advanced features of modern JavaScript (ES6)."}
-            ]
-        },
-        "Data Science": {
-            "Python for Data Science": [
-                {"name": "NumPy Basics",
-                    "description": "Get started with NumPy for numerical computations."},
-                {"name": "Data Visualization with Matplotlib",
-                    "description": "Visualize data effectively using Matplotlib."}
-            ],
-            "Machine Learning": [
-                {"name": "Supervised Learning",
-                    "description": "Understand the principles of supervised machine learning."},
-                {"name": "Unsupervised Learning",
-                    "description": "Explore clustering and other unsupervised techniques."}
-            ]
-        }
-    },
-    "Business": {
-        "Entrepreneurship": [
-            {"name": "Startup Basics",
-                "description": "Learn how to launch a successful startup."},
-            {"name": "Pitch Deck Preparation",
-                "description": "Master creating compelling pitch decks for investors."}
-        ],
-        "Management": [
-            {"name": "Leadership Skills",
-                "description": "Develop effective leadership qualities."},
-            {"name": "Time Management Techniques",
-                "description": "Learn to prioritize tasks and manage time effectively."}
-        ]
-    },
-    "Design": {
-        "Graphic Design": {
-            "Adobe Photoshop": [
-                {"name": "Getting Started with Photoshop",
-                    "description": "Learn essential Photoshop tools and techniques."},
-                {"name": "Advanced Photo Editing",
-                    "description": "Master advanced photo manipulation and editing."}
-            ],
-            "UI/UX Design": [
-                {"name": "Figma for Beginners",
-                    "description": "Create UI prototypes with ease using Figma."},
-                {"name": "Prototyping Techniques",
-                    "description": "Understand advanced prototyping methods for UX."}
-            ]
-        }
-    }
-}
-
-# Recursive function to add content to the tree view
-
-
-def add_tree_nodes(tree, parent, content):
-    """
-    Add nodes to the tree view recursively.
-    """
-    for key, value in content.items():
-        if isinstance(value, dict):
-            node = tree.insert(parent, "end", text=key)  # Add categories
-            add_tree_nodes(tree, node, value)  # Recurse for subcategories
-        elif isinstance(value, list):
-            for course in value:
-                tree.insert(parent, "end", text=course["name"], values=(
-                    course["description"],))  # Add courses
+# Default catalog: one id,parent_id,name,description row per category or course
+CATALOG_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "courses.csv")
+
+# Label of the scope that searches the whole catalog
+ALL_CATEGORIES = "All categories"
+
+# Tag of the dummy child that makes an unloaded category expandable
+PLACEHOLDER_TAG = "placeholder"
+
+# Flat course catalog
+
+
+def read_catalog_rows(file_path):
+    """
+    Stream (id, parent_id, name, description) rows from a CSV or JSON lines file.
+
+    A missing or empty parent_id marks a top-level category.
+    """
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
+        if file_path.endswith((".jsonl", ".json")):
+            records = (json.loads(line) for line in file if line.strip())
+            fields = ("id", "parent_id", "name", "description")
+            rows = ((record.get(field) for field in fields) for record in records)
+        else:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            columns = [header.index(field) for field in ("id", "parent_id", "name")]
+            description_column = header.index(
+                "description") if "description" in header else None
+            rows = ((row[columns[0]], row[columns[1]], row[columns[2]],
+                     row[description_column] if description_column is not None else "")
+                    for row in reader if row)
+
+        for row_id, parent_id, name, description in rows:
+            yield (int(row_id),
+                   int(parent_id) if parent_id not in (None, "") else None,
+                   name,
+                   description or "")
+
+
+class Catalog:
+    """
+    Course hierarchy held in compact parallel arrays.
+
+    Rows keep file order. Each row stores its id, the row of its parent
+    (-1 for top-level categories), a name and a description; rows without
+    a description are categories. The children of a row are found through
+    a children-offset index, like the rows of a CSR matrix.
+    """
+
+    def __init__(self, rows):
+        self.ids = array("q")
+        parent_ids = array("q")
+        self.names = []
+        self.descriptions = []
+
+        for row_id, parent_id, name, description in rows:
+            self.ids.append(row_id)
+            parent_ids.append(-1 if parent_id is None else parent_id)
+            self.names.append(sys.intern(name))
+            self.descriptions.append(description)
+
+        self._build_id_lookup()
+        self.parents = array("l", [
+            -1 if parent_id == -1 else self.row_of(parent_id) for parent_id in parent_ids])
+        self._build_children_index()
+
+    @classmethod
+    def load(cls, file_path):
+        """Load a catalog by streaming the rows of a CSV or JSON lines file."""
+        return cls(read_catalog_rows(file_path))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build_id_lookup(self):
+        """
+        Prepare id to row lookup: arithmetic for consecutive ids, otherwise
+        binary search over the ids sorted once.
+        """
+        ids = self.ids
+        self.id_base = None
+        if ids and ids[-1] - ids[0] == len(ids) - 1 and all(
+                ids[i] + 1 == ids[i + 1] for i in range(len(ids) - 1)):
+            self.id_base = ids[0]
+        elif all(ids[i] < ids[i + 1] for i in range(len(ids) - 1)):
+            self.sorted_ids = ids
+            self.id_rows = None
+        else:
+            self.id_rows = array("l", sorted(range(len(ids)), key=ids.__getitem__))
+            self.sorted_ids = array("q", (ids[row] for row in self.id_rows))
+
+    def row_of(self, row_id):
+        """Return the row holding an id."""
+        if self.id_base is not None:
+            row = row_id - self.id_base
+            if not 0 <= row < len(self.ids):
+                raise ValueError(f"Catalog refers to unknown id {row_id}")
+            return row
+
+        position = bisect_left(self.sorted_ids, row_id)
+        if position == len(self.sorted_ids) or self.sorted_ids[position] != row_id:
+            raise ValueError(f"Catalog refers to unknown id {row_id}")
+        return position if self.id_rows is None else self.id_rows[position]
+
+    def _build_children_index(self):
+        """
+        Group rows by parent with a counting sort; slot len(self) holds the top level.
+        """
+        count = len(self.ids)
+        self.child_offsets = array("l", [0]) * (count + 3)
+        for parent in self.parents:
+            self.child_offsets[(count if parent == -1 else parent) + 2] += 1
+        for slot in range(2, count + 3):
+            self.child_offsets[slot] += self.child_offsets[slot - 1]
+
+        # Each slot's start offset doubles as its insertion cursor, shifting
+        # the offsets into place as the rows are filled in
+        self.child_rows = array("l", [0]) * count
+        for row, parent in enumerate(self.parents):
+            slot = (count if parent == -1 else parent) + 1
+            self.child_rows[self.child_offsets[slot]] = row
+            self.child_offsets[slot] += 1
+        self.child_offsets.pop()
+
+        # Every row must hang below the top level, otherwise parents form a cycle
+        reached = 0
+        stack = [None]
+        while stack:
+            children = self.children(stack.pop())
+            reached += len(children)
+            stack.extend(children)
+        if reached != count:
+            raise ValueError("Catalog parent_id links form a cycle")
+
+    def children(self, row=None):
+        """Return the child rows of a row, or the top-level rows for None."""
+        slot = len(self.ids) if row is None else row
+        return self.child_rows[self.child_offsets[slot]:self.child_offsets[slot + 1]]
+
+    def is_course(self, row):
+        """Check whether a row is a course rather than a category."""
+        return bool(self.descriptions[row])
+
+    def ancestors(self, row):
+        """Return the category rows above a row, top level first."""
+        chain = []
+        parent = self.parents[row]
+        while parent != -1:
+            chain.append(parent)
+            parent = self.parents[parent]
+        return chain[::-1]
+
+    def path(self, row):
+        """Return the category names above a row, top level first."""
+        return tuple(self.names[ancestor] for ancestor in self.ancestors(row))
+
+# Searchable course index
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric terms."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class CourseIndex:
+    """
+    Search index over the courses of a catalog, built once.
+
+    Lowercased course names are kept in a sorted array for prefix
+    autocomplete, and name and description terms map to course rows for
+    full-text search. Searches can be scoped to a category row.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.terms = {}
+        names = []
+        categories = []
+
+        for row in range(len(catalog)):
+            if not catalog.is_course(row):
+                categories.append(row)
+                continue
+            names.append((catalog.names[row].lower(), row))
+            text = catalog.names[row] + " " + catalog.descriptions[row]
+            for term in set(tokenize(text)):
+                if term not in self.terms:
+                    self.terms[term] = array("l")
+                self.terms[term].append(row)
+
+        names.sort()
+        self.sorted_names = names
+        self.category_labels = dict(sorted(
+            (" / ".join(catalog.path(row) + (catalog.names[row],)), row) for row in categories))
+
+    def in_scope(self, row, scope):
+        """Check whether a row lies under the category row `scope`."""
+        if scope is None:
+            return True
+        parent = self.catalog.parents[row]
+        while parent != -1:
+            if parent == scope:
+                return True
+            parent = self.catalog.parents[parent]
+        return False
+
+    def complete(self, prefix, scope=None, limit=10):
+        """
+        Return up to `limit` course rows whose name starts with the prefix.
+        """
+        prefix = prefix.lower()
+        matches = []
+        position = bisect_left(self.sorted_names, (prefix,))
+        while position < len(self.sorted_names) and len(matches) < limit:
+            name, row = self.sorted_names[position]
+            if not name.startswith(prefix):
+                break
+            if self.in_scope(row, scope):
+                matches.append(row)
+            position += 1
+        return matches
+
+    def search(self, text, scope=None):
+        """
+        Return the rows of the courses whose name or description contains every term.
+        """
+        postings = [self.terms.get(term, ()) for term in set(tokenize(text))]
+        if not postings:
+            return []
+
+        postings.sort(key=len)
+        rows = set(postings[0])
+        for course_rows in postings[1:]:
+            rows.intersection_update(course_rows)
+        return [row for row in sorted(rows) if self.in_scope(row, scope)]
+
+# Functions to add content to the tree view on demand
+
+
+def add_tree_nodes(tree, catalog, parent_row=None):
+    """
+    Add the children of a catalog row to the tree view.
+
+    Tree items are named after their catalog row. Categories get a
+    placeholder child, so their own children are only inserted when they
+    are expanded.
+    """
+    parent = "" if parent_row is None else str(parent_row)
+    for row in catalog.children(parent_row):
+        if catalog.is_course(row):
+            tree.insert(parent, "end", iid=str(row), text=catalog.names[row],
+                        values=(catalog.descriptions[row],))  # Add courses
+        else:
+            node = tree.insert(parent, "end", iid=str(row),
+                               text=catalog.names[row])  # Add categories
+            tree.insert(node, "end", text="Loading...", tags=(PLACEHOLDER_TAG,))
+
+
+def load_tree_node(catalog, node):
+    """
+    Replace the placeholder of a category with its real children.
+    """
+    children = tree.get_children(node)
+    if len(children) == 1 and tree.tag_has(PLACEHOLDER_TAG, children[0]):
+        tree.delete(children[0])
+        add_tree_nodes(tree, catalog, int(node))
+
+
+def expand_tree_node(event, catalog):
+    """
+    Load the children of the category that was opened.
+    """
+    load_tree_node(catalog, tree.focus())
+
+
+def collapse_tree_node(event, catalog):
+    """
+    Unload the children of a closed category, leaving a placeholder behind.
+    """
+    node = tree.focus()
+    if node and not catalog.is_course(int(node)):
+        tree.delete(*tree.get_children(node))
+        tree.insert(node, "end", text="Loading...", tags=(PLACEHOLDER_TAG,))
+
+
+def jump_to_course(catalog, row):
+    """
+    Select a course in the tree, loading and opening only its ancestors.
+    """
+    for ancestor in catalog.ancestors(row):
+        load_tree_node(catalog, str(ancestor))
+        tree.item(str(ancestor), open=True)
+
+    node = str(row)
+    tree.selection_set(node)
+    tree.focus(node)
+    tree.see(node)
+
+# Callback functions for catalog search
+
+
+def show_search_hits(catalog, hit_rows, hits_list):
+    """
+    Fill the hits list with the given courses and their category paths.
+    """
+    hits_list.delete(0, tk.END)
+    for row in hit_rows:
+        path = " / ".join(catalog.path(row))
+        hits_list.insert(tk.END, f"{catalog.names[row]}  ({path})")
+    hits_list.hit_rows = hit_rows
+
+
+def search_scope(course_index, scope_var):
+    """
+    Convert the selected scope label back into a category row.
+    """
+    return course_index.category_labels.get(scope_var.get())
+
+
+def autocomplete_courses(course_index, search_var, scope_var, hits_list):
+    """
+    Suggest courses whose name starts with the typed text.
+    """
+    text = search_var.get().strip()
+    hit_rows = course_index.complete(
+        text, search_scope(course_index, scope_var)) if text else []
+    show_search_hits(course_index.catalog, hit_rows, hits_list)
+
+
+def search_courses(course_index, search_var, scope_var, hits_list):
+    """
+    List the courses matching every term of the typed text.
+    """
+    text = search_var.get().strip()
+    show_search_hits(course_index.catalog, course_index.search(
+        text, search_scope(course_index, scope_var)), hits_list)
+
+
+def open_search_hit(course_index, hits_list):
+    """
+    Jump to the course selected in the hits list.
+    """
+    selection = hits_list.curselection()
+    if selection:
+        jump_to_course(course_index.catalog, hits_list.hit_rows[selection[0]])
 
 # Callback function to display course details
 
@@ -107,6 +382,10 @@ def main():
     """
     Main function to create an enhanced Tkinter GUI for browsing Udemy content.
     """
+    # Stream the catalog given on the command line, or the bundled one
+    catalog_path = sys.argv[1] if len(sys.argv) > 1 else CATALOG_PATH
+    catalog = Catalog.load(catalog_path)
+
     # Create the main application window
     root = tk.Tk()
     root.title("Udemy Course Browser")
@@ -118,6 +397,33 @@ def main():
     left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=False)
     right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
 
+    # Catalog search with autocomplete and category scope
+    course_index = CourseIndex(catalog)
+    search_frame = ttk.Frame(left_frame)
+    search_frame.pack(fill=tk.X, padx=5, pady=5)
+
+    search_var = tk.StringVar()
+    search_entry = ttk.Entry(search_frame, textvariable=search_var)
+    search_entry.pack(fill=tk.X)
+
+    scope_var = tk.StringVar(value=ALL_CATEGORIES)
+    scope_box = ttk.Combobox(search_frame, textvariable=scope_var, state="readonly",
+                             values=[ALL_CATEGORIES] + list(course_index.category_labels))
+    scope_box.pack(fill=tk.X, pady=(5, 0))
+
+    hits_list = tk.Listbox(search_frame, height=6)
+    hits_list.pack(fill=tk.X, pady=(5, 0))
+    hits_list.hit_rows = []
+
+    search_var.trace_add("write", lambda *args: autocomplete_courses(
+        course_index, search_var, scope_var, hits_list))
+    search_entry.bind("<Return>", lambda event: search_courses(
+        course_index, search_var, scope_var, hits_list))
+    scope_box.bind("<<ComboboxSelected>>", lambda event: autocomplete_courses(
+        course_index, search_var, scope_var, hits_list))
+    hits_list.bind("<<ListboxSelect>>",
+                   lambda event: open_search_hit(course_index, hits_list))
+
     # Tree view for hierarchical content
     global tree
     tree = ttk.Treeview(left_frame, columns=("Description"),
@@ -128,8 +434,10 @@ def main():
     tree.column("Description", stretch=False, width=0)
     tree.pack(fill=tk.BOTH, expand=True)
 
-    # Add Udemy content to the tree view
-    add_tree_nodes(tree, "", udemy_content)
+    # Add the top level of the catalog; the rest loads on expansion
+    add_tree_nodes(tree, catalog)
+    tree.bind("<<TreeviewOpen>>", lambda event: expand_tree_node(event, catalog))
+    tree.bind("<<TreeviewClose>>", lambda event: collapse_tree_node(event, catalog))
 
     # Text widget for course details
     details_label = ttk.Label(
@@ -1,7 +1,351 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import csv
+import math
+import multiprocessing
+import os
+import queue
 import re
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import islice
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Pattern: field:value or field<value or field>value or field=value (also <=, >=)
+FIELD_CONDITION_PATTERN = re.compile(r'(\w+)(<=|>=|[:<>=])(.*)')
+CONDITION_OPERATORS = (":", "<", ">", "=", "<=", ">=")
+
+# Numeric columns answered from sorted range indexes
+NUMERIC_FIELDS = ("price", "weight", "rating")
+
+# Buckets of the equi-width histogram kept per numeric column for estimates
+NUMERIC_HISTOGRAM_BUCKETS = 32
+
+# Once fewer than 1/FILTER_RATIO of the rows remain undecided, the next
+# operand is evaluated only on those rows instead of its whole column
+FILTER_RATIO = 16
+
+# Results view: (heading, field) per column and rows materialized beyond
+# each edge of the visible window
+RESULT_COLUMNS = (("ID", "id"), ("Name", "name"), ("Category", "category"),
+                  ("Price", "price"), ("Brand", "brand"), ("Score", "score"))
+RESULT_OVERSCAN = 20
+
+# Background loading: rows parsed and indexed per chunk, and how often the UI
+# checks the loader's progress
+INGEST_CHUNK_ROWS = 20000
+INGEST_POLL_MS = 100
+
+# Bounds of the LRU cache of subexpression results, which are kept as packed
+# bitmaps of n/8 bytes each
+QUERY_CACHE_ENTRIES = 256
+QUERY_CACHE_BYTES = 32 * 1024 * 1024
+
+# Ranked mode: weight of a term occurrence per field, the default p of the
+# p-norm operators and how many of the best matches are returned
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "brand": 2.0}
+DEFAULT_P_NORM = 2.0
+RANKED_RESULTS = 50
+
+# Number of candidate values to verify from which a predicate-only subquery
+# runs on the process pool, one contiguous partition of rows per worker
+PARALLEL_MIN_CANDIDATES = 50000
+
+# Budget of a Boolean query: seconds of wall time and rows examined, where
+# checking a distinct value for a substring counts as VERIFIED_VALUE_ROWS rows.
+# A query over budget is cancelled and returns the matches found so far
+QUERY_TIME_BUDGET = 2.0
+QUERY_ROW_BUDGET = 200_000_000
+VERIFIED_VALUE_ROWS = 100
+
+# A query estimated to examine more than CHUNKED_QUERY_COST rows (or its row
+# budget) is searched QUERY_CHUNK_ROWS rows at a time, so a cancelled query
+# still returns the matches of the chunks done; distinct values verified
+# between two budget checks
+CHUNKED_QUERY_COST = 20_000_000
+QUERY_CHUNK_ROWS = 65536
+BUDGET_CHECK_VALUES = 4096
+
+# Low-cardinality columns stored as integer codes into a value dictionary;
+# their rows are also grouped by value for facet drill-down
+CATEGORICAL_FIELDS = ("category", "brand", "color", "in_stock")
+
+# Facet values listed per field in the facet panel, most frequent first
+FACET_VALUE_LIMIT = 20
+
+
+def parse_number(text):
+    """Parse a numeric cell, returning NaN when it is missing or invalid."""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of the text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def format_number(value):
+    """Format a numeric cell for display, dropping a trailing '.0'."""
+    if value != value:
+        return ""
+    text = repr(float(value))
+    return text[:-2] if text.endswith(".0") else text
+
+
+# ------------------------- Parallel Predicate Evaluation -------------------------
+
+# Shared memory segments attached by this (worker) process, and Python copies
+# of the text columns verified with `in`, by segment name; all of them belong
+# to one generation of the shared columns
+attached_segments = {}
+attached_texts = {}
+attached_generation = None
+
+
+def attach_generation(generation):
+    """
+    Switch to a generation of the shared columns, closing the segments of
+    the previous one, which the app has unlinked since.
+    """
+    global attached_generation
+    if generation != attached_generation:
+        for segment in attached_segments.values():
+            segment.close()
+        attached_segments.clear()
+        attached_texts.clear()
+        attached_generation = generation
+
+
+def attach_shared_array(spec):
+    """Map a (segment name, dtype, shape) spec to an array over shared memory."""
+    name, dtype, shape = spec
+    segment = attached_segments.get(name)
+    if segment is None:
+        try:
+            segment = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13; the creating process tracks the segment
+            segment = shared_memory.SharedMemory(name=name)
+        attached_segments[name] = segment
+    return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def attached_text(columns, field):
+    """Return the distinct values of a text column as strings, decoded once per process."""
+    spec = columns["text", field]
+    if spec[0] not in attached_texts:
+        attached_texts[spec[0]] = attach_shared_array(spec).tobytes().decode("utf-8").split("\0")
+    return attached_texts[spec[0]]
+
+
+def evaluate_residual(columns, node, start, end):
+    """
+    Evaluate a predicate-only syntax tree on rows start..end of the shared
+    columns, returning a boolean mask over those rows.
+
+    Leaves are ("range", ...) as produced by the parser, ("empty",), and
+    ("match", field, operator, value, candidates, negated), where candidates
+    are the value ids allowed by the field's indexes (None for all of them).
+    """
+    kind = node[0]
+    if kind == "empty":
+        return np.zeros(end - start, dtype=bool)
+
+    if kind == "range":
+        _, field, low, high, include_low, include_high = node
+        column = attach_shared_array(columns["numeric", field])[start:end]
+        mask = ~np.isnan(column)  # Missing values match no range
+        if low is not None:
+            mask &= column >= low if include_low else column > low
+        if high is not None:
+            mask &= column <= high if include_high else column < high
+        return mask
+
+    if kind == "match":
+        _, field, operator, value, candidates, negated = node
+        codes = attach_shared_array(columns["codes", field])[start:end]
+        values = attached_text(columns, field)
+        matches = np.zeros(len(values), dtype=bool)
+        matches[codes] = True  # Values present in this partition
+        value_ids = np.flatnonzero(matches) if candidates is None else candidates[matches[candidates]]
+        matches[:] = False
+        if operator == ":":
+            # Verify the candidates present in this partition
+            value_ids = [value_id for value_id in value_ids.tolist()
+                         if value in values[value_id]]
+        matches[value_ids] = True
+        mask = matches[codes]
+        return ~mask if negated else mask
+
+    if kind == "not":
+        return ~evaluate_residual(columns, node[1], start, end)
+
+    masks = [evaluate_residual(columns, child, start, end) for child in node[1]]
+    if kind == "and":
+        return np.logical_and.reduce(masks)
+    return np.logical_or.reduce(masks)
+
+
+def start_worker():
+    """
+    Process pool task submitted once per worker when the pool starts, so
+    the workers import this module before the first query reaches them.
+    """
+
+
+def evaluate_partition(columns, generation, node, start, end):
+    """
+    Process pool task: evaluate a residual tree on one partition of rows
+    of the given generation of shared columns. Returns the packed mask and
+    the CPU seconds spent.
+    """
+    began = time.process_time()
+    attach_generation(generation)
+    mask = evaluate_residual(columns, node, start, end)
+    return np.packbits(mask), time.process_time() - began
+
+
+# ------------------------- Query Budget -------------------------
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised by a plan step to cancel a query that ran out of budget."""
+
+
+# ------------------------- Product Store -------------------------
+
+
+class ProductStore:
+    """
+    Columnar product table.
+
+    Numeric columns are float64 NumPy arrays with NaN for missing values,
+    categorical columns are int32 code arrays into a list of distinct
+    values, and every other column is a list of interned strings. Search
+    plans work on whole columns and rows are only materialized as dicts
+    for display.
+    """
+
+    def __init__(self, fieldnames):
+        self.fields = list(fieldnames)
+        self.size = 0
+        self.numeric = {field: np.zeros(0) for field in self.fields
+                        if field in NUMERIC_FIELDS}
+        self.codes = {field: np.zeros(0, dtype=np.int32) for field in self.fields
+                      if field in CATEGORICAL_FIELDS}
+        self.categories = {field: [] for field in self.codes}
+        self.lookups = {field: {} for field in self.codes}
+        self.strings = {field: [] for field in self.fields
+                        if field not in self.numeric and field not in self.codes}
+
+    @classmethod
+    def from_rows(cls, fieldnames, rows):
+        """Build a store from an iterable of CSV row dicts in a single pass."""
+        store = cls(fieldnames or ())
+        store.append_rows(rows)
+        return store
+
+    def append_rows(self, rows):
+        """
+        Append an iterable of CSV row dicts, returning how many were added.
+        Existing rows never change, so they can be read while rows are appended.
+        """
+        numeric = {field: array("d") for field in self.numeric}
+        codes = {field: array("i") for field in self.codes}
+        strings = {field: [] for field in self.strings}
+        count = 0
+
+        for row in rows:
+            for field, column in numeric.items():
+                column.append(parse_number(row.get(field)))
+            for field, column in codes.items():
+                value = row.get(field) or ""
+                code = self.lookups[field].get(value)
+                if code is None:
+                    code = self.lookups[field][value] = len(self.categories[field])
+                    self.categories[field].append(sys.intern(value))
+                column.append(code)
+            for field, column in strings.items():
+                column.append(sys.intern(row.get(field) or ""))
+            count += 1
+
+        for field, column in numeric.items():
+            self.numeric[field] = np.concatenate(
+                (self.numeric[field], np.array(column, dtype=np.float64)))
+        for field, column in codes.items():
+            self.codes[field] = np.concatenate(
+                (self.codes[field], np.array(column, dtype=np.int32)))
+        for field, column in strings.items():
+            self.strings[field].extend(column)
+        self.size += count
+        return count
+
+    def __len__(self):
+        return self.size
+
+    def value(self, field, row):
+        """Return the display string of one cell."""
+        if field in self.numeric:
+            return format_number(self.numeric[field][row])
+        if field in self.codes:
+            return self.categories[field][self.codes[field][row]]
+        return self.strings[field][row]
+
+    def row(self, row):
+        """Materialize one product as a dict of display strings."""
+        return {field: self.value(field, row) for field in self.fields}
+
+    def column_strings(self, field, start=0):
+        """Display strings of a column for the rows from `start` on."""
+        if field in self.numeric:
+            return [format_number(value) for value in self.numeric[field][start:].tolist()]
+        if field in self.codes:
+            categories = self.categories[field]
+            return [categories[code] for code in self.codes[field][start:].tolist()]
+        return self.strings[field][start:]
+
+    def sort_order(self, field):
+        """
+        Permutation of all rows sorting them by a column, ascending with
+        missing values last. Text compares case-insensitively, and numerically
+        when every non-blank value of the column is a number (as for ids).
+        """
+        if field not in self.fields:
+            return np.arange(self.size)
+        if field in self.numeric:
+            return np.argsort(self.numeric[field], kind="stable")  # NaN sorts last
+
+        values, codes = self.dictionary(field)
+        blank = [not value.strip() for value in values]
+        numbers = [parse_number(value) for value in values]
+        if any(number != number for number, missing in zip(numbers, blank) if not missing):
+            keys = [(missing, value.lower()) for value, missing in zip(values, blank)]
+        else:
+            keys = [(missing, 0.0 if missing else number) for number, missing in zip(numbers, blank)]
+        ranks = np.empty(len(values), dtype=np.int32)
+        ranks[sorted(range(len(values)), key=keys.__getitem__)] = np.arange(len(values))
+        return np.argsort(ranks[codes], kind="stable")
+
+    def dictionary(self, field):
+        """
+        Dictionary-encode a text column, returning its distinct values and
+        an int32 array giving each row's position among them.
+        """
+        if field in self.codes:
+            return self.categories[field], self.codes[field]
+        lookup = {}
+        codes = np.fromiter((lookup.setdefault(value, len(lookup))
+                             for value in self.strings[field]),
+                            dtype=np.int32, count=self.size)
+        return list(lookup), codes
 
 
 class EcommerceSearchSystem:
@@ -14,52 +358,393 @@ class EcommerceSearchSystem:
         master.geometry("800x600")
 
         # Step 2: Search Criteria Definition
-        self.products = []
+        self.store = ProductStore.from_rows((), ())
+        self.result_store = self.store
+        self.plan_steps = []
+        self.result_rows = np.zeros(0, dtype=np.int64)
+        self.result_offset = 0
+        self.result_cache = {}
+        self.sort_state = None
+        self.current_query = None
+        self.current_p_norm = None
+        self.query_budget = None
+        self.query_cost = 0
+        self.truncation = None
+        self.workers = 1
+        self.pool = None
+        self.pool_workers = 0
+        self.pool_started = []
+        self.shared_segments = None
+        self.shared_column_specs = {}
+        self.shared_generation = 0
+        self.result_order = None
+        self.result_scores = {}
+        self.result_bitmap = np.zeros(0, dtype=np.uint8)
+        self.facet_filters = []
+        self.ingest_generation = 0
+        self.index_lock = threading.RLock()
         self.create_search_interface()
+        self.create_term_representation()
 
     def load_product_data(self):
         """
         Load product data from CSV file
+
+        The file is parsed and indexed on a worker thread, so the window
+        stays responsive and the first chunks are searchable while the
+        rest of the file is still loading.
         """
+        file_path = filedialog.askopenfilename(
+            title="Select Product CSV",
+            filetypes=[("CSV files", "*.csv")]
+        )
+
+        if not file_path:
+            messagebox.showwarning("Warning", "No file selected.")
+            return
+
+        # A newer load makes any running worker stop at its next chunk
+        self.ingest_generation += 1
+        self.current_query = None
+        # Filters, sorting and rows of the previous result refer to the old store
+        self.facet_filters = []
+        self.truncation = None
+        self.sort_state = None
+        self.result_rows = np.zeros(0, dtype=np.int64)
+        self.result_cache = {}
+        messages = queue.Queue()
+        threading.Thread(target=self.ingest_products,
+                         args=(file_path, self.ingest_generation, messages),
+                         daemon=True).start()
+        self.load_progress.config(value=0)
+        self.master.after(INGEST_POLL_MS, self.poll_ingest, self.ingest_generation, messages)
+
+    def ingest_products(self, file_path, generation, messages):
+        """
+        Worker thread: read the CSV in chunks of INGEST_CHUNK_ROWS rows,
+        append each chunk to a new store and index it under index_lock,
+        then report ("progress", rows loaded, fraction of the file read).
+        Ends with a ("done", ...) or ("error", exception, ...) message.
+        """
+        total_bytes = max(1, os.path.getsize(file_path))
+        read_bytes = 0
+
+        def counted(lines):
+            nonlocal read_bytes
+            for line in lines:
+                read_bytes += len(line)
+                yield line
+
         try:
-            file_path = filedialog.askopenfilename(
-                title="Select Product CSV",
-                filetypes=[("CSV files", "*.csv")]
-            )
+            with open(file_path, 'r', encoding='utf-8-sig', newline='') as file:
+                reader = csv.DictReader(counted(file))
+                store = None
+                while True:
+                    chunk = list(islice(reader, INGEST_CHUNK_ROWS))
+                    with self.index_lock:
+                        if generation != self.ingest_generation:
+                            return
+                        if store is None:
+                            store = self.store = ProductStore(reader.fieldnames or ())
+                            self.create_term_representation()
+                        start = len(store)
+                        store.append_rows(chunk)
+                        self.index_rows(start)
+                    messages.put(("progress", len(store), min(1.0, read_bytes / total_bytes)))
+                    if len(chunk) < INGEST_CHUNK_ROWS:
+                        break
+            messages.put(("done", len(store), 1.0))
+        except Exception as e:
+            messages.put(("error", e, 0.0))
+
+    def poll_ingest(self, generation, messages):
+        """
+        Apply the loader's progress messages and refresh the results with
+        the rows indexed so far
+        """
+        if generation != self.ingest_generation:
+            return
 
-            if not file_path:
-                messagebox.showwarning("Warning", "No file selected.")
-                return
+        kind = None
+        try:
+            while kind not in ("done", "error"):
+                kind, detail, fraction = messages.get_nowait()
+        except queue.Empty:
+            pass
 
-            with open(file_path, 'r', encoding='utf-8-sig') as file:
-                reader = csv.DictReader(file)
-                self.products = list(reader)
+        if kind == "error":
+            self.load_progress.config(value=0)
+            messagebox.showerror("Error", f"Could not load file: {detail}")
+            return
 
-            # Update term matrix and display loaded products
-            self.create_term_representation()
-            self.display_products(self.products)
+        if kind is not None:
+            self.load_progress.config(value=fraction * 100)
+            self.refresh_results()
 
+        if kind == "done":
+            self.update_workers()
             messagebox.showinfo("Success", "Product data loaded successfully.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not load file: {e}")
+            return
+
+        if kind is not None:
+            self.result_count_label.config(
+                text=f"{len(self.result_rows)} products "
+                     f"(loading: {detail} rows indexed, {fraction:.0%} of file)")
+        self.master.after(INGEST_POLL_MS, self.poll_ingest, generation, messages)
+
+    def refresh_results(self):
+        """
+        Re-run the current query, or list every product when there is none,
+        keeping the scroll position
+        """
+        offset = self.result_offset
+        if self.current_query is None:
+            self.truncation = None
+            self.show_results(np.ones(len(self.store), dtype=bool))
+        elif self.current_p_norm is not None:
+            self.show_ranked_results(*self.ranked_search(self.current_query, self.current_p_norm))
+        else:
+            self.show_results(self.search_mask(self.current_query))
+        self.result_offset = offset
+        self.render_results()
+
+    def show_results(self, mask):
+        """
+        Cache the result of a query as a packed bitmap, then display it
+        narrowed by the active facet filters
+        """
+        self.result_order = None
+        self.result_scores = {}
+        self.result_bitmap = np.packbits(mask)
+        self.apply_facet_filters()
+
+    def show_ranked_results(self, rows, scores):
+        """
+        Display ranked products best first, with their scores
+        """
+        self.result_bitmap = np.packbits(self.rows_mask(rows))
+        self.result_order = rows
+        self.result_scores = dict(zip(rows.tolist(), scores.tolist()))
+        self.apply_facet_filters()
+
+    def apply_facet_filters(self):
+        """
+        Narrow the cached result bitmap to the rows of every selected facet
+        value, display the remaining products and recount the facets.
+        The query itself is not evaluated again. Filters on a field or value
+        the current store does not have are skipped.
+        """
+        with self.index_lock:
+            store = self.store
+            size = len(store)
+            # Rows loaded after the result was computed unpack as zeros
+            matches = np.unpackbits(self.result_bitmap, count=size).view(bool)
+            for field, code in self.facet_filters:
+                if field in self.facet_rows and code < len(self.facet_rows[field][1]) - 1:
+                    value_rows = self.facet_value_rows(field, code)
+                    narrowed = np.zeros(size, dtype=bool)
+                    narrowed[value_rows] = matches[value_rows]
+                    matches = narrowed
+            if self.result_order is None:
+                rows = np.flatnonzero(matches)
+            else:  # Keep the ranking
+                rows = self.result_order[matches[self.result_order]]
+            counts = self.facet_counts(rows)
+
+        self.display_products(rows, store)
+        self.show_facets(counts, store)
+
+    def facet_counts(self, rows):
+        """
+        Count the result rows under every facet value with one bincount
+        of their codes per field.
+        """
+        return {field: np.bincount(codes[rows], minlength=len(self.store.categories[field]))
+                for field, codes in self.store.codes.items()}
+
+    def facet_value_rows(self, field, code):
+        """Rows holding one value of a categorical field, in row order."""
+        order, bounds = self.facet_rows[field]
+        return order[bounds[code]:bounds[code + 1]]
+
+    def show_facets(self, counts, store):
+        """
+        List the facet values of `store` with their counts in the facet panel
+        """
+        tree = self.facet_tree
+        tree.delete(*tree.get_children())
+        for field, field_counts in counts.items():
+            parent = tree.insert('', 'end', text=field, open=True)
+            for code in np.argsort(-field_counts, kind="stable")[:FACET_VALUE_LIMIT]:
+                if not field_counts[code]:
+                    break
+                value = store.categories[field][code] or "(blank)"
+                tree.insert(parent, 'end', iid=f"{field}:{code}",
+                            text=f"{value} ({field_counts[code]})")
 
-    def display_products(self, products):
+        self.facet_filter_label.config(text=", ".join(
+            f"{field}={store.categories[field][code]}"
+            for field, code in self.facet_filters
+            if code < len(store.categories.get(field, ()))) or "No filters")
+
+    def drill_down(self, event=None):
+        """
+        Narrow the results to the selected facet value
+        """
+        selection = self.facet_tree.selection()
+        if not selection or ":" not in selection[0]:
+            return
+        field, code = selection[0].rsplit(":", 1)
+        self.facet_filters.append((field, int(code)))
+        self.apply_facet_filters()
+
+    def clear_facet_filters(self):
+        """
+        Remove every facet filter from the results
+        """
+        self.facet_filters = []
+        self.apply_facet_filters()
+
+    def display_products(self, rows, store):
         """
         Display products in the results tree
+
+        The result is kept as an array of product rows. The tree holds only
+        the items of the visible window, which are refilled in place when
+        the view scrolls, so showing a large result costs the same as a small one.
+        The rows are kept with the store they index, so the view keeps
+        rendering from it when a new load replaces self.store.
+        """
+        self.result_store = store
+        self.result_rows = np.asarray(rows)
+        self.result_offset = 0
+        self.result_cache = {}
+        if self.sort_state is not None:
+            self.result_rows = self.sorted_result_rows(*self.sort_state)
+        count = f"{len(self.result_rows)} products"
+        if self.truncation is not None:
+            count += (f" (truncated after {self.truncation['searched']} of {len(store)}"
+                      f" products: {self.truncation['reason']})")
+        self.result_count_label.config(text=count)
+        self.render_results()
+
+    def visible_result_count(self):
+        """Number of rows that fit in the results tree."""
+        height = self.results_tree.winfo_height()
+        if height <= 1:  # Not mapped yet
+            return int(self.results_tree.cget("height"))
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # One row of space is taken by the headings
+        return max(1, height // row_height - 1)
+
+    def fetch_result_window(self, start, end):
+        """
+        Materialize the products of the window plus the overscan on each side,
+        dropping cached products that fell outside it.
+        """
+        low = max(0, start - RESULT_OVERSCAN)
+        high = min(len(self.result_rows), end + RESULT_OVERSCAN)
+        window = self.result_rows[low:high].tolist()
+        cache = {}
+        for row in window:
+            values = self.result_cache.get(row)
+            if values is None:
+                score = self.result_scores.get(row)
+                values = tuple(self.result_store.value(field, row) if field in self.result_store.fields
+                               else "" if score is None else f"{score:.3f}"
+                               for _, field in RESULT_COLUMNS)
+            cache[row] = values
+        self.result_cache = cache
+
+    def render_results(self, event=None):
+        """
+        Refill the tree items with the products of the visible window
+        """
+        tree = self.results_tree
+        visible = self.visible_result_count()
+        total = len(self.result_rows)
+        self.result_offset = max(0, min(self.result_offset, total - visible))
+        start, end = self.result_offset, min(total, self.result_offset + visible)
+
+        if any(row not in self.result_cache for row in self.result_rows[start:end].tolist()):
+            self.fetch_result_window(start, end)
+
+        # Reuse the existing items, adding or removing only the difference
+        items = list(tree.get_children())
+        while len(items) < end - start:
+            items.append(tree.insert('', 'end'))
+        if len(items) > end - start:
+            tree.delete(*items[end - start:])
+            del items[end - start:]
+        tree.selection_remove(tree.selection())
+        for item, row in zip(items, self.result_rows[start:end].tolist()):
+            tree.item(item, values=self.result_cache[row])
+
+        if total:
+            self.results_scrollbar.set(start / total, end / total)
+        else:
+            self.results_scrollbar.set(0, 1)
+
+    def scroll_results(self, action, amount, unit=None):
+        """
+        Scrollbar command: move the visible window of the results
         """
-        # Clear existing rows
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+        visible = self.visible_result_count()
+        if action == "moveto":
+            self.result_offset = int(float(amount) * len(self.result_rows))
+        elif unit == "pages":
+            self.result_offset += int(amount) * visible
+        else:
+            self.result_offset += int(amount)
+        self.render_results()
 
-        # Populate with new data
-        for product in products:
-            self.results_tree.insert('', 'end', values=(
-                product.get("id"),
-                product.get("name"),
-                product.get("category"),
-                product.get("price"),
-                product.get("brand"),
-            ))
+    def scroll_results_wheel(self, event):
+        """
+        Scroll the results with the mouse wheel
+        """
+        if event.num == 4 or event.delta > 0:
+            self.scroll_results("scroll", -3, "units")
+        else:
+            self.scroll_results("scroll", 3, "units")
+        return "break"
+
+    def sorted_result_rows(self, field, descending):
+        """
+        Order the current result by a column using the store's precomputed
+        sort permutation: one pass over the permutation keeps the rows
+        that are in the result, with no comparisons. The score column
+        restores the ranking.
+        """
+        store = self.result_store
+        if field not in store.fields:
+            if self.result_order is None:
+                return self.result_rows
+            order = self.result_order[np.isin(self.result_order, self.result_rows)]
+            return order[::-1] if descending else order
+
+        with self.index_lock:
+            if store is self.store:
+                order = self.sort_orders.get(field)
+                if order is None:
+                    order = self.sort_orders[field] = self.store.sort_order(field)
+            else:  # A load replaced the store since the result was shown
+                order = store.sort_order(field)
+            if descending:
+                order = order[::-1]
+            in_result = np.zeros(len(store), dtype=bool)
+            in_result[self.result_rows] = True
+            return order[in_result[order]]
+
+    def sort_results(self, field):
+        """
+        Sort the displayed products by a column, toggling the direction
+        when the same column is clicked again
+        """
+        descending = self.sort_state == (field, False)
+        self.sort_state = (field, descending)
+        self.result_rows = self.sorted_result_rows(field, descending)
+        self.result_offset = 0
+        self.render_results()
 
     def create_search_interface(self):
         """
@@ -82,32 +767,303 @@ class EcommerceSearchSystem:
         ttk.Button(search_frame, text="Search",
                    command=self.process_boolean_query).pack(side=tk.LEFT, padx=5)
 
-        # Results Display
+        # Ranked Mode: p-norm extended Boolean scoring
+        self.ranked_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Ranked, p =",
+                        variable=self.ranked_var).pack(side=tk.LEFT, padx=(5, 0))
+        self.p_norm_var = tk.StringVar(value=str(DEFAULT_P_NORM))
+        ttk.Spinbox(search_frame, from_=1, to=10, increment=0.5, width=4,
+                    textvariable=self.p_norm_var).pack(side=tk.LEFT)
+
+        # Query Plan Button
+        ttk.Button(search_frame, text="Show Plan",
+                   command=self.show_query_plan).pack(side=tk.LEFT, padx=5)
+
+        # Result Count and Loading Progress
+        status_frame = ttk.Frame(self.master)
+        status_frame.pack(padx=10, fill=tk.X)
+        self.result_count_label = ttk.Label(status_frame, text="0 products")
+        self.result_count_label.pack(side=tk.LEFT)
+        self.load_progress = ttk.Progressbar(status_frame, length=200, maximum=100)
+        self.load_progress.pack(side=tk.RIGHT)
+
+        # Worker processes for predicate-only subqueries on large catalogs
+        self.workers_var = tk.StringVar(value="1")
+        ttk.Spinbox(status_frame, from_=1, to=os.cpu_count() or 1, width=3,
+                    textvariable=self.workers_var, command=self.update_workers).pack(side=tk.RIGHT, padx=(0, 10))
+        ttk.Label(status_frame, text="Workers:").pack(side=tk.RIGHT)
+
+        body_frame = ttk.Frame(self.master)
+        body_frame.pack(padx=10, pady=10, expand=True, fill=tk.BOTH)
+
+        # Facet Panel: double-click a value to drill down
+        facet_frame = ttk.Frame(body_frame)
+        facet_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
+        self.facet_filter_label = ttk.Label(facet_frame, text="No filters", wraplength=180)
+        self.facet_filter_label.pack(anchor=tk.W)
+        ttk.Button(facet_frame, text="Clear Filters",
+                   command=self.clear_facet_filters).pack(anchor=tk.W, pady=5)
+        self.facet_tree = ttk.Treeview(facet_frame, show='tree', selectmode='browse')
+        self.facet_tree.column("#0", width=200)
+        self.facet_tree.pack(expand=True, fill=tk.Y)
+        self.facet_tree.bind("<Double-1>", self.drill_down)
+        self.facet_tree.bind("<Return>", self.drill_down)
+
+        # Results Display with a scrollbar driving the visible window
+        results_frame = ttk.Frame(body_frame)
+        results_frame.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
         self.results_tree = ttk.Treeview(
-            self.master,
-            columns=("ID", "Name", "Category", "Price", "Brand"),
+            results_frame,
+            columns=[heading for heading, _ in RESULT_COLUMNS],
             show='headings'
         )
-        for col in ("ID", "Name", "Category", "Price", "Brand"):
-            self.results_tree.heading(col, text=col)
-        self.results_tree.pack(padx=10, pady=10, expand=True, fill=tk.BOTH)
+        for col, field in RESULT_COLUMNS:
+            self.results_tree.heading(col, text=col,
+                                      command=lambda field=field: self.sort_results(field))
+        self.results_scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL,
+                                               command=self.scroll_results)
+        self.results_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.results_tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+
+        self.results_tree.bind("<Configure>", self.render_results)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.results_tree.bind(sequence, self.scroll_results_wheel)
 
     def create_term_representation(self):
         """
         Enhanced Term Representation
+
+        Rebuilds every index of the current store from scratch.
+        """
+        self.term_postings = {}
+        self.term_frequencies = {}
+        self.field_values = {}
+        self.field_lookups = {}
+        self.field_codes = {}
+        self.field_trigrams = {}
+        self.field_exact = {}
+        self.field_value_counts = {}
+        self.facet_rows = {}
+        self.query_cache = OrderedDict()
+        self.query_cache_bytes = 0
+        self.index_rows(0)
+
+    def index_rows(self, start):
+        """
+        Bring the indexes up to date with the rows appended from `start` on.
+        """
+        self.index_term_rows(start)
+        self.clear_query_cache()
+        self.release_shared_columns()
+        self.sort_orders = {}
+        self.create_numeric_indexes()
+        self.index_field_rows(start)
+        self.index_facet_rows(start)
+
+    def index_term_rows(self, start):
+        """
+        Extend the inverted index, which maps each term to a sorted int32
+        array of the rows containing it, with the rows from `start` on.
+        An aligned float32 array holds the term's frequency in each row,
+        counting an occurrence by the FIELD_WEIGHTS of its field.
+        Repeated values such as categories are split only once per call.
         """
-        self.term_matrix = {}
-        for product in self.products:
+        postings = {}
+        frequencies = {}
+        split_cache = {}
+        columns = [self.store.column_strings(field, start) for field in self.store.fields]
+        weights = [FIELD_WEIGHTS.get(field, 1.0) for field in self.store.fields]
+        for row, values in enumerate(zip(*columns), start):
             # Aggregate searchable terms
-            terms = set()
-            for key, value in product.items():
-                if value:  # Ensure value is not None
+            terms = {}
+            for value, weight in zip(values, weights):
+                val_terms = split_cache.get(value)
+                if val_terms is None:
                     # Split by non-alphanumeric as well to handle punctuation
-                    val_terms = re.split(r'\W+', value.lower())
-                    # remove empty strings
-                    val_terms = [t for t in val_terms if t]
-                    terms.update(val_terms)
-            self.term_matrix[product['id']] = terms
+                    val_terms = split_cache[value] = [
+                        t for t in re.split(r'\W+', value.lower()) if t]
+                for term in val_terms:
+                    terms[term] = terms.get(term, 0.0) + weight
+
+            # Add the product row to the postings of each of its terms
+            for term, frequency in terms.items():
+                postings.setdefault(term, array("i")).append(row)
+                frequencies.setdefault(term, array("f")).append(frequency)
+
+        for term, rows in postings.items():
+            rows = np.array(rows, dtype=np.int32)
+            term_frequencies = np.array(frequencies[term], dtype=np.float32)
+            existing = self.term_postings.get(term)
+            if existing is None:
+                self.term_postings[term] = rows
+                self.term_frequencies[term] = term_frequencies
+            else:
+                self.term_postings[term] = np.concatenate((existing, rows))
+                self.term_frequencies[term] = np.concatenate(
+                    (self.term_frequencies[term], term_frequencies))
+
+    def create_numeric_indexes(self):
+        """
+        Build a sorted value array and an aligned row array for every
+        numeric column, so range conditions are answered by binary search.
+        """
+        self.numeric_values = {}
+        self.numeric_rows = {}
+        self.numeric_histograms = {}
+        for field, column in self.store.numeric.items():
+            order = np.argsort(column, kind="stable")
+            order = order[~np.isnan(column[order])]  # Missing values never match
+            values = column[order]
+            self.numeric_values[field] = values
+            self.numeric_rows[field] = order.astype(np.int32)
+
+            # Row and distinct-value counts per bucket feed the planner
+            if len(values):
+                counts, edges = np.histogram(values, bins=NUMERIC_HISTOGRAM_BUCKETS)
+                distinct, _ = np.histogram(np.unique(values), bins=edges)
+                self.numeric_histograms[field] = (edges, counts, distinct)
+
+    def index_field_rows(self, start):
+        """
+        Extend the trigram index and the exact-value hash index of every
+        text column with the rows from `start` on. Both are keyed on the
+        column's distinct lowercased values; a per-row code array maps
+        matching values back to product rows.
+        """
+        for field in self.store.fields:
+            if field in self.store.numeric:
+                continue
+            values = self.field_values.setdefault(field, [])
+            first_new = len(values)
+
+            if field in self.store.codes:
+                # Categorical codes already number the distinct values
+                values.extend(value.lower()
+                              for value in self.store.categories[field][first_new:])
+                codes = self.store.codes[field]
+            else:
+                lookup = self.field_lookups.setdefault(field, {})
+                new_codes = array("i")
+                for value in self.store.strings[field][start:]:
+                    code = lookup.get(value)
+                    if code is None:
+                        code = lookup[value] = len(values)
+                        values.append(value.lower())
+                    new_codes.append(code)
+                codes = np.concatenate((self.field_codes.get(field, np.zeros(0, dtype=np.int32)),
+                                        np.array(new_codes, dtype=np.int32)))
+
+            grams = {}
+            exact = self.field_exact.setdefault(field, {})
+            for value_id in range(first_new, len(values)):
+                exact.setdefault(values[value_id], []).append(value_id)
+                for gram in trigrams(values[value_id]):
+                    grams.setdefault(gram, array("i")).append(value_id)
+
+            postings = self.field_trigrams.setdefault(field, {})
+            for gram, value_ids in grams.items():
+                value_ids = np.array(value_ids, dtype=np.int32)
+                existing = postings.get(gram)
+                postings[gram] = (
+                    value_ids if existing is None else np.concatenate((existing, value_ids)))
+
+            self.field_codes[field] = codes
+            self.field_value_counts[field] = np.bincount(codes, minlength=len(values))
+
+    def index_facet_rows(self, start):
+        """
+        Group the rows of every categorical field by value: the rows sorted
+        stably by code, so each group stays in row order, and the offset of
+        each value's group. One row array per field, however many values
+        it has; the groups are re-sorted whenever rows are appended.
+        """
+        for field, codes in self.store.codes.items():
+            count = len(self.store.categories[field])
+            order = np.argsort(codes, kind="stable")
+            bounds = np.zeros(count + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes, minlength=count), out=bounds[1:])
+            self.facet_rows[field] = (order, bounds)
+
+    def trigram_candidates(self, field, value):
+        """
+        Ids of the distinct values of a field holding every trigram of
+        `value`, intersected rarest trigram first. None when `value` is
+        shorter than three characters and every value is a candidate.
+        """
+        postings = self.field_trigrams[field]
+        candidates = None
+        for gram in sorted(trigrams(value), key=lambda g: len(postings.get(g, ()))):
+            value_ids = postings.get(gram)
+            if value_ids is None:
+                return np.zeros(0, dtype=np.int32)
+            candidates = value_ids if candidates is None else np.intersect1d(
+                candidates, value_ids, assume_unique=True)
+        return candidates
+
+    def substring_value_ids(self, field, value):
+        """
+        Find the distinct values of a field containing `value`.
+
+        Only the trigram candidates are checked; values shorter than three
+        characters fall back to a scan of the field's distinct values.
+        """
+        candidates = self.trigram_candidates(field, value)
+        if candidates is None:
+            candidates = np.arange(len(self.field_values[field]))
+        return self.verify_substring(field, value, candidates)
+
+    def verify_substring(self, field, value, value_ids):
+        """
+        Keep the ids of the distinct values containing `value`, charging
+        the query budget block by block so a long check can be cancelled.
+        """
+        values = self.field_values[field]
+        matches = []
+        for start in range(0, len(value_ids), BUDGET_CHECK_VALUES):
+            block = value_ids[start:start + BUDGET_CHECK_VALUES]
+            self.charge(len(block) * VERIFIED_VALUE_ROWS)
+            matches.extend(value_id for value_id in block.tolist() if value in values[value_id])
+        return matches
+
+    def substring_verdicts(self, field, value):
+        """
+        Per-value verdicts of a substring condition before any check:
+        0 for values missing one of its trigrams, -1 (unknown) for the rest.
+        """
+        candidates = self.trigram_candidates(field, value)
+        if candidates is None:
+            return np.full(len(self.field_values[field]), -1, dtype=np.int8)
+        verdicts = np.zeros(len(self.field_values[field]), dtype=np.int8)
+        verdicts[candidates] = -1
+        return verdicts
+
+    def substring_filter(self, field, value, verdicts, rows):
+        """
+        Filter `rows` on a substring condition, verifying only the unknown
+        values that occur in them and recording the outcome in `verdicts`.
+        """
+        codes = self.field_codes[field][rows]
+        pending = np.unique(codes[verdicts[codes] < 0])
+        verdicts[pending] = 0
+        verdicts[self.verify_substring(field, value, pending)] = 1
+        return verdicts[codes] == 1
+
+    def value_ids_mask(self, field, value_ids, rows=None):
+        """Expand a list of distinct-value ids of a field into a row mask."""
+        matches = np.zeros(len(self.field_values[field]), dtype=bool)
+        matches[value_ids] = True
+        codes = self.field_codes[field]
+        return matches[codes if rows is None else codes[rows]]
+
+    def rows_mask(self, rows):
+        """Scatter an array of product rows into a boolean mask."""
+        mask = np.zeros(len(self.store), dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def mask_size(self, rows):
+        """Length of the mask a plan returns: every product, or only `rows`."""
+        return len(self.store) if rows is None else len(rows)
 
     def process_boolean_query(self):
         """
@@ -119,56 +1075,77 @@ class EcommerceSearchSystem:
             return
 
         # Perform search
-        results = self.boolean_search(query.lower())
+        self.update_workers()
+        try:
+            if self.ranked_var.get():
+                p_norm = float(self.p_norm_var.get())
+                if not 1 <= p_norm < math.inf:
+                    raise ValueError("p must be a number of at least 1")
+                results = self.ranked_search(query.lower(), p_norm)
+            else:
+                p_norm = None
+                results = self.search_mask(query.lower())
+        except ValueError as e:
+            messagebox.showerror("Query Error", f"Invalid query: {e}")
+            return
+        self.current_query = query.lower()
+        self.current_p_norm = p_norm
+        self.facet_filters = []
 
         # Display Results
-        self.display_products(results)
+        if p_norm is None:
+            self.show_results(results)
+        else:
+            self.sort_state = None  # Show the ranking
+            self.show_ranked_results(*results)
 
     def tokenize_query(self, query):
         """
-        Tokenize the query into terms, operators, and conditions.
+        Tokenize the query into terms, operators, parentheses and conditions.
         This handles:
         - Boolean operators: and, or, not
+        - Parentheses for grouping
         - Field-based queries: field:value or field:not value
-        - Numeric conditions: price<100, price>200, price=799.99
+        - Numeric conditions: price<100, price>=200, weight=2.2, rating:4..5, price < 100
         - Regular terms
 
         Assumes query is lowercased already.
         """
 
-        # Split on whitespace first
-        raw_tokens = query.split()
+        # Split on whitespace first, keeping parentheses as separate tokens
+        raw_tokens = re.sub(r'([()])', r' \1 ', query).split()
 
         tokens = []
         i = 0
         while i < len(raw_tokens):
             token = raw_tokens[i]
 
-            # Check for boolean operators
-            if token in ["and", "or", "not"]:
+            # Check for boolean operators and parentheses
+            if token in ["and", "or", "not", "(", ")"]:
                 tokens.append(token)
                 i += 1
                 continue
 
             # Check for field conditions (with :, <, >, =)
             # Pattern: field:value or field<value or field>value or field=value
-            field_condition_match = re.match(r'(\w+)([:<>=])(.*)', token)
+            field_condition_match = FIELD_CONDITION_PATTERN.match(token)
             if field_condition_match:
+                # Merge "brand:not soundwave" into a single negated condition
+                if field_condition_match.group(3) == "not" and i + 1 < len(raw_tokens):
+                    tokens.append(f"{token} {raw_tokens[i+1]}")
+                    i += 2
+                    continue
+
                 # It's a single-token condition like category:electronics or price<100
                 tokens.append(token)
                 i += 1
                 continue
 
-            # If we get something like "brand:not" "SoundWave", we should merge
-            # But let's handle "not" as a separate token. If user wrote brand:not SoundWave
-            # Then next token "SoundWave" is a separate term. We'll handle the "not" within evaluate_field_condition.
-
-            # If it's just a term, check if next tokens combine into a condition
+            # If it's just a term, check if the next tokens form a condition
             # For example: "price", "<", "100"
-            if i + 2 < len(raw_tokens):
-                # Check if next two tokens form a numeric condition: field < value
+            if i + 2 < len(raw_tokens) and raw_tokens[i+1] in CONDITION_OPERATORS:
                 combined = token + raw_tokens[i+1] + raw_tokens[i+2]
-                if re.match(r'(\w+)(<|>|=)(\S+)', combined):
+                if FIELD_CONDITION_PATTERN.match(combined):
                     tokens.append(combined)
                     i += 3
                     continue
@@ -182,143 +1159,859 @@ class EcommerceSearchSystem:
     def boolean_search(self, query):
         """
         Implement Boolean Extended Search Logic with Relational Operators
+
+        The query is parsed and compiled once, then the plan combines
+        boolean row masks, so only the matching products are materialized.
         """
-        tokens = self.tokenize_query(query)
-        matching_products = []
+        return [self.store.row(row) for row in self.search_rows(query)]
 
-        for product in self.products:
-            product_terms = self.term_matrix[product['id']]  # Extract terms
-            match = self.evaluate_boolean_expression(
-                tokens, product, product_terms)
-            if match:
-                matching_products.append(product)
+    def search_rows(self, query):
+        """
+        Run a query and return the array of matching product rows.
+        """
+        return np.flatnonzero(self.search_mask(query))
 
-        return matching_products
+    def search_mask(self, query, time_budget=QUERY_TIME_BUDGET, row_budget=QUERY_ROW_BUDGET):
+        """
+        Run a query and return a boolean mask over the product rows.
 
-    def evaluate_boolean_expression(self, tokens, product, product_terms):
+        The query runs within a time and a row budget, None meaning no
+        limit. Once the budget runs out, the query is cancelled at its next
+        step and self.truncation records the reason and the number of
+        products searched; it is None for a complete result. A query whose
+        estimated cost is high or exceeds the row budget is searched chunk
+        by chunk, so when cancelled its mask holds the matches of the chunks
+        searched. A cheaper query runs whole, and if it is cancelled all the
+        same the mask is empty.
         """
-        Evaluate Boolean Expression for a single product with numeric and field-based conditions.
-        We'll go through tokens linearly:
-        - Terms or conditions produce True/False
-        - "not" flips the next condition
-        - "and"/"or" combine with accumulated result
+        began = time.perf_counter()
+        tree = self.canonical_query(self.parse_query(self.tokenize_query(query)))
+        # Indexes are only read between the loader's chunks
+        with self.index_lock:
+            self.plan_steps = []
+            self.truncation = None
+            self.query_budget = {"time": time_budget, "rows": row_budget, "examined": 0,
+                                 "deadline": None if time_budget is None else began + time_budget}
+            try:
+                plan = self.compile_query(tree)
+                self.query_cost = self.estimate_cost(tree)
+                if self.query_cost <= min(CHUNKED_QUERY_COST, row_budget or math.inf):
+                    return plan()
+                return self.search_in_chunks(tree, plan)
+            except QueryBudgetExceeded as e:
+                self.truncation = {"reason": str(e), "searched": 0}
+                return np.zeros(len(self.store), dtype=bool)
+            finally:
+                self.query_budget = None
+
+    def search_in_chunks(self, node, plan):
         """
+        Run the plan of a query over consecutive chunks of rows, so that a
+        cancelled query still returns every match in the chunks searched
+        before. A complete result goes to the query cache like any other
+        full-catalog result.
+        """
+        mask = np.zeros(len(self.store), dtype=bool)
+        for start in range(0, len(mask), QUERY_CHUNK_ROWS):
+            rows = np.arange(start, min(start + QUERY_CHUNK_ROWS, len(mask)))
+            try:
+                mask[rows] = plan(rows)
+            except QueryBudgetExceeded as e:
+                self.truncation = {"reason": str(e), "searched": start}
+                return mask
+        if node[0] not in ("term", "empty"):
+            self.cache_query_result(node, mask)
+        return mask
 
-        result = None
-        current_op = "and"
-        negate_next = False
+    def ranked_search(self, query, p_norm=DEFAULT_P_NORM, k=RANKED_RESULTS):
+        """
+        Extended Boolean search: score products with the p-norm model and
+        return the rows and scores of the best k, best first.
 
-        for token in tokens:
-            if token in ["and", "or"]:
-                current_op = token
-                negate_next = False
-                continue
-            elif token == "not":
-                negate_next = not negate_next
-                continue
-            else:
-                # Evaluate the token as a condition or a term
-                match = self.evaluate_token_condition(
-                    token, product, product_terms)
-
-                # Apply negation if needed
-                if negate_next:
-                    match = not match
-                    negate_next = False
-
-                # Combine with result using current_op
-                if result is None:
-                    result = match
-                else:
-                    if current_op == "and":
-                        result = result and match
-                    elif current_op == "or":
-                        result = result or match
+        Only candidates, the products matching a condition that is not
+        negated, are scored; their scores are computed for all of them at
+        once with array operations and the top k picked by partitioning.
+        Ranked queries run without a time or row budget and are never
+        truncated.
+        """
+        tree = self.canonical_query(self.parse_query(self.tokenize_query(query)))
+        with self.index_lock:
+            self.plan_steps = []
+            self.truncation = None
+            candidates = self.ranking_candidates(tree)
+            if not len(candidates):
+                return candidates, np.zeros(0)
+            scores = self.p_norm_scores(tree, candidates, p_norm)
 
-        return bool(result)
+        best = np.flatnonzero(scores > 0)
+        if len(best) > k:
+            best = best[np.argpartition(-scores[best], k - 1)[:k]]
+        best = best[np.lexsort((candidates[best], -scores[best]))]
+        return candidates[best], scores[best]
 
-    def evaluate_token_condition(self, token, product, product_terms):
+    def ranking_candidates(self, node):
         """
-        Evaluate a single token which could be:
-        - A simple term
-        - A field:value or field<value or field>value or field=value condition
+        Rows matching any leaf of the query outside a NOT, as a sorted array.
         """
+        kind = node[0]
+        if kind == "not":
+            return np.zeros(0, dtype=np.int64)
+        if kind in ("and", "or"):
+            parts = [self.ranking_candidates(child) for child in node[1]]
+            return np.unique(np.concatenate(parts))
+        if kind == "term":
+            return self.term_postings.get(node[1], np.zeros(0, dtype=np.int32)).astype(np.int64)
+        return np.flatnonzero(self.compile_query(node)())
 
-        # Check for field-based conditions or numeric conditions
-        field_condition_match = re.match(r'(\w+)([:<>=])(.*)', token)
-        if field_condition_match:
-            field = field_condition_match.group(1)
-            operator = field_condition_match.group(2)
-            value = field_condition_match.group(3).strip()
+    def term_weights(self, term, candidates):
+        """
+        TF-IDF weight in [0, 1] of a term for each candidate row: the field
+        weighted frequency relative to the term's highest frequency, times
+        the inverse document frequency relative to its maximum, log(n).
+        """
+        weights = np.zeros(len(candidates))
+        postings = self.term_postings.get(term)
+        if postings is None or not len(postings):
+            return weights
 
-            if field == "price":
-                return self.evaluate_price_condition(operator, value, product["price"])
-            else:
-                return self.evaluate_field_condition(field, operator, value, product)
+        size = len(self.store)
+        idf = math.log(size / len(postings)) / math.log(size) if size > 1 else 1.0
+        frequencies = self.term_frequencies[term]
+        positions = np.searchsorted(candidates, postings)
+        found = positions < len(candidates)
+        found[found] = candidates[positions[found]] == postings[found]
+        weights[positions[found]] = frequencies[found] / frequencies.max() * idf
+        return weights
+
+    def p_norm_scores(self, node, candidates, p_norm):
+        """
+        Score candidate rows against a syntax tree with the p-norm operators:
+        OR = (mean(w^p))^(1/p) and AND = 1 - (mean((1 - w)^p))^(1/p), with
+        NOT = 1 - w. Terms weigh by TF-IDF; other conditions weigh 0 or 1.
+        """
+        kind = node[0]
+        if kind == "term":
+            return self.term_weights(node[1], candidates)
+        if kind == "not":
+            return 1.0 - self.p_norm_scores(node[1], candidates, p_norm)
+        if kind == "or":
+            weights = np.array([self.p_norm_scores(child, candidates, p_norm)
+                                for child in node[1]])
+            return np.mean(weights ** p_norm, axis=0) ** (1 / p_norm)
+        if kind == "and":
+            weights = np.array([self.p_norm_scores(child, candidates, p_norm)
+                                for child in node[1]])
+            return 1.0 - np.mean((1.0 - weights) ** p_norm, axis=0) ** (1 / p_norm)
+        return self.compile_query(node)(candidates).astype(float)
 
-        # Otherwise, it's just a term check
-        return token in product_terms
+    def parse_query(self, tokens):
+        """
+        Parse query tokens into an abstract syntax tree.
+        Precedence from lowest to highest is OR, AND, NOT; adjacent
+        conditions are joined with AND and parentheses group.
 
-    def evaluate_field_condition(self, field, operator, value, product):
+        Nodes are tuples:
+        ("term", term), ("field", field, operator, value, negated),
+        ("range", field, low, high, include_low, include_high),
+        ("empty",), ("not", node), ("and", (nodes...)), ("or", (nodes...))
         """
-        Evaluate field-specific conditions.
-        Supports:
-        field:value (substring match),
-        field:not <value>,
-        where operator can be ':' indicating a substring match in product[field].
-        If 'not' appears at the start of value, it negates the condition.
+        position = 0
+
+        def peek():
+            return tokens[position] if position < len(tokens) else None
+
+        def advance():
+            nonlocal position
+            position += 1
+            return tokens[position - 1]
+
+        def parse_or():
+            nodes = [parse_and()]
+            while peek() == "or":
+                advance()
+                nodes.append(parse_and())
+            return nodes[0] if len(nodes) == 1 else ("or", tuple(nodes))
+
+        def parse_and():
+            nodes = [parse_not()]
+            while peek() not in (None, "or", ")"):
+                if peek() == "and":
+                    advance()
+                nodes.append(parse_not())
+            return nodes[0] if len(nodes) == 1 else ("and", tuple(nodes))
+
+        def parse_not():
+            if peek() == "not":
+                advance()
+                return ("not", parse_not())
+            return parse_primary()
+
+        def parse_primary():
+            token = peek()
+            if token in (None, "and", "or", ")"):
+                raise ValueError(
+                    f"Expected a search term but found '{token or 'end of query'}'")
+            advance()
+            if token == "(":
+                node = parse_or()
+                if peek() != ")":
+                    raise ValueError("Missing closing parenthesis")
+                advance()
+                return node
+            return self.parse_condition(token)
+
+        if not tokens:
+            raise ValueError("Empty query")
+
+        tree = parse_or()
+        if position != len(tokens):
+            raise ValueError(f"Unexpected '{tokens[position]}' in query")
+        return tree
+
+    def canonical_query(self, node):
         """
-        field = field.lower()
-        if field not in product:
-            return False
+        Rewrite a syntax tree into a canonical form, so equivalent queries
+        share cache entries: nested AND/OR are flattened, their operands
+        deduplicated and sorted, and double negations removed.
+        """
+        kind = node[0]
+        if kind == "not":
+            child = self.canonical_query(node[1])
+            return child[1] if child[0] == "not" else ("not", child)
+        if kind not in ("and", "or"):
+            return node
 
-        product_val = str(product[field]).lower()
+        operands = set()
+        for child in node[1]:
+            child = self.canonical_query(child)
+            if child[0] == kind:
+                operands.update(child[1])
+            else:
+                operands.add(child)
+        if len(operands) == 1:
+            return operands.pop()
+        return (kind, tuple(sorted(operands, key=repr)))
+
+    def parse_condition(self, token):
+        """
+        Turn a single token into a leaf node, parsing the field, operator
+        and value of conditions once.
+        """
+        field_condition_match = FIELD_CONDITION_PATTERN.match(token)
+        if not field_condition_match:
+            return ("term", token)
+
+        field = field_condition_match.group(1)
+        operator = field_condition_match.group(2)
+        value = field_condition_match.group(3).strip()
+
+        if field in NUMERIC_FIELDS:
+            return self.parse_numeric_condition(field, operator, value)
 
         # Handle "not" inside the value for field conditions
         # e.g. brand:not soundwave
-        # If so, we strip "not" and check negation
-        negation = False
-        # If value starts with "not ", remove it and set negation
-        if value.startswith("not "):
-            negation = True
+        negated = value.startswith("not ")
+        if negated:
             value = value[4:].strip()
+        return ("field", field, operator, value, negated)
 
-        if operator == ":":
-            # substring check
-            match = (value in product_val)
-            if negation:
-                match = not match
-            return match
-
-        # If other operators appear here (like '='), we could do equality checks
-        if operator == "=":
-            match = (product_val == value)
-            if negation:
-                match = not match
-            return match
-
-        # By default, if unsupported operator for fields, return False
-        return False
-
-    def evaluate_price_condition(self, operator, value, product_price):
+    def parse_numeric_condition(self, field, operator, value):
         """
-        Evaluate Price conditions like:
-        price<100, price=199.99, price>500
+        Normalize a numeric condition into a range node. Supports
+        <, >, <=, >=, = (or : with a single number) and the inclusive
+        between-range field:low..high. A range bound may be None.
         """
         try:
-            product_price = float(product_price)
+            if operator == ":" and ".." in value:
+                low, high = value.split("..", 1)
+                return ("range", field, float(low) if low else None,
+                        float(high) if high else None, True, True)
+
             target = float(value)
         except ValueError:
-            return False  # Invalid numeric value
+            return ("empty",)  # Invalid numeric value matches nothing
 
+        if operator in ("=", ":"):
+            return ("range", field, target, target, True, True)
         if operator == "<":
-            return product_price < target
-        elif operator == ">":
-            return product_price > target
+            return ("range", field, None, target, False, False)
+        if operator == "<=":
+            return ("range", field, None, target, False, True)
+        if operator == ">":
+            return ("range", field, target, None, False, False)
+        return ("range", field, target, None, True, False)
+
+    def estimate_rows(self, node):
+        """
+        Estimate how many products a syntax tree matches, from term
+        document frequencies, numeric histograms and field value counts.
+        Operands of AND and OR are assumed to be independent.
+        """
+        total = len(self.store)
+        kind = node[0]
+
+        if kind == "term":
+            return len(self.term_postings.get(node[1], ()))
+
+        cached = self.query_cache.get(node)
+        if cached is not None:
+            return cached[1]
+
+        if kind == "empty":
+            return 0
+
+        if kind == "range":
+            return self.estimate_range(*node[1:])
+
+        if kind == "field":
+            field, operator, value, negated = node[1:]
+            if field not in self.field_values or operator not in (":", "="):
+                return 0
+            counts = self.field_value_counts[field]
+            if operator == "=":
+                estimate = int(counts[self.field_exact[field].get(value, [])].sum())
+            else:
+                # The rarest trigram of the value bounds the matching rows
+                postings = self.field_trigrams[field]
+                grams = trigrams(value)
+                estimate = min((int(counts[postings[gram]].sum()) if gram in postings else 0
+                                for gram in grams), default=total)
+            return total - estimate if negated else estimate
+
+        if kind == "not":
+            return total - self.estimate_rows(node[1])
+
+        if not total:
+            return 0
+        fractions = [self.estimate_rows(child) / total for child in node[1]]
+        if kind == "and":
+            return total * math.prod(fractions)
+        return total * (1 - math.prod(1 - fraction for fraction in fractions))
+
+    def estimate_range(self, field, low, high, include_low, include_high):
+        """
+        Estimate a numeric range from the column histogram, assuming values
+        are spread evenly inside each bucket. Point ranges use the average
+        number of rows per distinct value in their bucket.
+        """
+        if field not in self.numeric_histograms:
+            return 0
+        edges, counts, distinct = self.numeric_histograms[field]
+
+        if low is not None and low == high:
+            bucket = np.searchsorted(edges, low, "right") - 1
+            bucket = min(bucket, len(counts) - 1)  # The last bucket includes its right edge
+            if bucket < 0 or low > edges[-1] or not distinct[bucket]:
+                return 0
+            return counts[bucket] / distinct[bucket]
+
+        low = -math.inf if low is None else low
+        high = math.inf if high is None else high
+        left, right = edges[:-1], edges[1:]
+        width = right - left
+        overlap = np.clip(np.minimum(right, high) - np.maximum(left, low), 0, None)
+        inside = (left >= low) & (right <= high)
+        fraction = np.where(width > 0, overlap / np.where(width > 0, width, 1), inside)
+        return float((counts * fraction).sum())
+
+    def describe_node(self, node):
+        """Describe a single plan step for the query plan view."""
+        kind = node[0]
+        if kind == "term":
+            return f"term '{node[1]}'"
+        if kind == "field":
+            field, operator, value, negated = node[1:]
+            return f"{field}{operator}{'not ' if negated else ''}{value}"
+        if kind == "range":
+            field, low, high, include_low, include_high = node[1:]
+            return (f"{field} in {'[' if include_low else '('}"
+                    f"{'-inf' if low is None else low}, {'inf' if high is None else high}"
+                    f"{']' if include_high else ')'}")
+        return kind.upper()
+
+    def estimate_cost(self, node):
+        """
+        Estimate the rows a query examines, the figure bounded by its row
+        budget: every step yields a mask over the catalog, and substring
+        conditions also verify their trigram candidates, which count as
+        VERIFIED_VALUE_ROWS rows each. As operands evaluated as filters
+        examine fewer rows, this is an upper bound.
+        """
+        cost = len(self.store)
+        kind = node[0]
+        if node in self.query_cache:
+            return cost
+        if kind == "field":
+            cost += self.verification_cost(node) * VERIFIED_VALUE_ROWS
+        elif kind == "not":
+            cost += self.estimate_cost(node[1])
+        elif kind in ("and", "or"):
+            cost += sum(self.estimate_cost(child) for child in node[1])
+        return cost
+
+    def charge(self, rows):
+        """
+        Count rows examined against the budget of the running query, and
+        cancel it by raising QueryBudgetExceeded once its time or rows are
+        spent. Plans call this before each step, so cancelling is cooperative.
+        """
+        budget = self.query_budget
+        if budget is None:
+            return
+        budget["examined"] += rows
+        if budget["rows"] is not None and budget["examined"] > budget["rows"]:
+            raise QueryBudgetExceeded(f"row budget of {budget['rows']:,} rows exceeded")
+        if budget["deadline"] is not None and time.perf_counter() > budget["deadline"]:
+            raise QueryBudgetExceeded(f"time budget of {budget['time']:g} s exceeded")
+
+    def time_left(self):
+        """Seconds left in the time budget of the running query, or None."""
+        if self.query_budget is None or self.query_budget["deadline"] is None:
+            return None
+        return max(0.0, self.query_budget["deadline"] - time.perf_counter())
+
+    def format_plan(self):
+        """Render the last query plan with estimated and actual cardinalities."""
+        lines = [f"Estimated cost: {self.query_cost:,.0f} rows examined"]
+        if self.query_cost > CHUNKED_QUERY_COST:
+            lines.append(f"Searched in chunks of {QUERY_CHUNK_ROWS} rows"
+                         " (actual counts are for the last chunk)")
+        if self.truncation is not None:
+            lines.append(f"Truncated after {self.truncation['searched']} products: "
+                         f"{self.truncation['reason']}")
+        for step in self.plan_steps:
+            if step["actual"] is None:
+                actual = "skipped"
+            elif step["input"] is None:
+                actual = f"actual {step['actual']}"
+            else:
+                actual = f"actual {step['actual']} (filter over {step['input']} rows)"
+            if step["cached"]:
+                actual += " (cached)"
+            elif step["report"]:
+                actual += f" ({step['report']})"
+            lines.append(f"{'    ' * step['depth']}{step['label']}: "
+                         f"estimated {step['estimate']:.0f}, {actual}")
+        return "\n".join(lines)
+
+    def show_query_plan(self):
+        """
+        Show the plan chosen for the last query
+        """
+        if not self.plan_steps:
+            messagebox.showwarning("Warning", "Run a search first.")
+            return
+        messagebox.showinfo("Query Plan", self.format_plan())
+
+    def clear_query_cache(self):
+        """Drop every cached subexpression result, e.g. when rows are added."""
+        self.query_cache.clear()
+        self.query_cache_bytes = 0
+
+    def cache_query_result(self, node, mask):
+        """
+        Store the full-catalog result of a subexpression as a packed bitmap,
+        evicting the least recently used entries beyond the cache bounds.
+        """
+        bits = np.packbits(mask)
+        previous = self.query_cache.pop(node, None)
+        if previous is not None:
+            self.query_cache_bytes -= previous[0].nbytes
+        self.query_cache[node] = (bits, int(np.count_nonzero(mask)))
+        self.query_cache_bytes += bits.nbytes
+        while self.query_cache and (len(self.query_cache) > QUERY_CACHE_ENTRIES
+                                    or self.query_cache_bytes > QUERY_CACHE_BYTES):
+            _, (evicted, _) = self.query_cache.popitem(last=False)
+            self.query_cache_bytes -= evicted.nbytes
+
+    def cached_query_result(self, node):
+        """Return the cached mask of a subexpression, or None, marking it recently used."""
+        cached = self.query_cache.get(node)
+        if cached is None:
+            return None
+        self.query_cache.move_to_end(node)
+        return np.unpackbits(cached[0], count=len(self.store)).view(bool)
+
+    def cached_subset(self, node):
+        """
+        Find the largest cached AND/OR of the same kind whose operands are a
+        subset of the node's, such as the previous step of a refined query.
+        """
+        operands = set(node[1])
+        best = None
+        for key in self.query_cache:
+            if (key[0] == node[0] and len(key[1]) < len(operands)
+                    and (best is None or len(key[1]) > len(best[1]))
+                    and operands.issuperset(key[1])):
+                best = key
+        return best
+
+    def shared_columns(self):
+        """
+        Copy the columns read by residual predicates into shared memory,
+        once per version of the indexes, and return their specs: numeric
+        columns, and per text field the row codes plus the distinct
+        lowercased values as one NUL-separated UTF-8 buffer.
+        """
+        if self.shared_segments is not None:
+            return self.shared_column_specs
+
+        self.shared_segments = []
+        self.shared_column_specs = {}
+        self.shared_generation += 1
+
+        def share(key, values):
+            segment = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=segment.buf)[...] = values
+            self.shared_segments.append(segment)
+            self.shared_column_specs[key] = (segment.name, values.dtype.str, values.shape)
+
+        for field, column in self.store.numeric.items():
+            share(("numeric", field), column)
+        for field, values in self.field_values.items():
+            text = "\0".join(value.replace("\0", " ") for value in values).encode("utf-8")
+            share(("text", field), np.frombuffer(text, dtype=np.uint8))
+            share(("codes", field), self.field_codes[field])
+        return self.shared_column_specs
+
+    def release_shared_columns(self):
+        """Free the shared memory copies of the columns."""
+        for segment in self.shared_segments or ():
+            segment.close()
+            segment.unlink()
+        self.shared_segments = None
+
+    def process_pool(self):
+        """
+        Return the worker pool, starting it again when the number of workers
+        changed. Workers are spawned rather than forked, since the window
+        and the loader thread must not be copied into them; they start up
+        in the background.
+        """
+        if self.pool is None or self.pool_workers != self.workers:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn"))
+            self.pool_workers = self.workers
+            self.pool_started = [self.pool.submit(start_worker) for _ in range(self.workers)]
+        return self.pool
+
+    def update_workers(self):
+        """
+        Apply the Workers setting, starting the pool ahead of the first
+        parallel query
+        """
+        try:
+            self.workers = max(1, int(self.workers_var.get()))
+        except ValueError:
+            self.workers = 1
+        if self.workers > 1:
+            self.process_pool()
+
+    def close(self):
+        """
+        Stop the worker pool and free shared memory when the app exits
+        """
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        self.release_shared_columns()
+
+    def is_residual(self, node):
+        """Whether a syntax tree holds only field and numeric conditions."""
+        if node[0] in ("field", "range", "empty"):
+            return True
+        if node[0] == "not":
+            return self.is_residual(node[1])
+        if node[0] in ("and", "or"):
+            return all(self.is_residual(child) for child in node[1])
+        return False
+
+    def uses_process_pool(self, node):
+        """
+        Whether a subquery is evaluated by the process pool: it must hold
+        only field and numeric conditions, and its substring conditions
+        must leave enough candidates to verify to outweigh the pool's
+        overhead. Numeric conditions alone are already vectorized.
+        """
+        return (self.workers > 1 and self.is_residual(node)
+                and self.verification_cost(node) >= PARALLEL_MIN_CANDIDATES)
+
+    def verification_cost(self, node):
+        """
+        Number of distinct values the substring conditions of a tree must
+        verify, bounded by the values holding the rarest trigram of each.
+        """
+        kind = node[0]
+        if kind == "field":
+            field, operator, value = node[1:4]
+            if operator != ":" or field not in self.field_values:
+                return 0
+            postings = self.field_trigrams[field]
+            return min((len(postings.get(gram, ())) for gram in trigrams(value)),
+                       default=len(self.field_values[field]))
+        if kind == "not":
+            return self.verification_cost(node[1])
+        if kind in ("and", "or"):
+            return sum(self.verification_cost(child) for child in node[1])
+        return 0
+
+    def residual_tree(self, node):
+        """
+        Resolve the field conditions of a predicate-only tree against the
+        field indexes, so workers only verify candidates: exact values
+        become their value ids and substrings their trigram candidates.
+        """
+        kind = node[0]
+        if kind == "field":
+            field, operator, value, negated = node[1:]
+            if field not in self.field_values or operator not in (":", "="):
+                return ("empty",)
+            if operator == "=":
+                candidates = np.array(self.field_exact[field].get(value, []), dtype=np.int32)
+            else:
+                candidates = self.trigram_candidates(field, value)
+            return ("match", field, operator, value, candidates, negated)
+        if kind == "not":
+            return ("not", self.residual_tree(node[1]))
+        if kind in ("and", "or"):
+            return (kind, tuple(self.residual_tree(child) for child in node[1]))
+        return node
+
+    def compile_parallel(self, node, plan, step):
+        """
+        Run a predicate-only subquery over the whole catalog, or a chunk of
+        it, on the process pool: the rows are split into one contiguous
+        partition per worker and the partition masks are joined in row
+        order. Filtering scattered rows stays in this process. The step
+        records the wall time, the CPU time of the workers and their
+        utilization, the share of the partitions' wall time spent computing.
+        """
+        def parallel_plan(rows=None):
+            if rows is None:
+                first, last = 0, len(self.store)
+            elif len(rows) * FILTER_RATIO >= QUERY_CHUNK_ROWS and rows[-1] - rows[0] == len(rows) - 1:
+                first, last = int(rows[0]), int(rows[-1]) + 1
+            else:
+                return plan(rows)
+
+            # Pool startup is not charged to the query budget
+            pool = self.process_pool()
+            if not all(future.done() for future in self.pool_started):
+                waited = time.perf_counter()
+                for future in self.pool_started:
+                    future.result()
+                if self.time_left() is not None:
+                    self.query_budget["deadline"] += time.perf_counter() - waited
+
+            # Charge this range's share of the verification cost
+            self.charge(self.verification_cost(node) * VERIFIED_VALUE_ROWS
+                        * (last - first) // max(len(self.store), 1))
+            began = time.perf_counter()
+            columns = self.shared_columns()
+            residual = self.residual_tree(node)
+            bounds = np.linspace(first, last, self.workers + 1).astype(int).tolist()
+            partitions = list(zip(bounds[:-1], bounds[1:]))
+            futures = [pool.submit(evaluate_partition, columns, self.shared_generation,
+                                   residual, start, end)
+                       for start, end in partitions]
+
+            masks = []
+            busy = 0.0
+            for (start, end), future in zip(partitions, futures):
+                try:
+                    bits, seconds = future.result(timeout=self.time_left())
+                except FutureTimeoutError:
+                    for pending in futures:
+                        pending.cancel()
+                    raise QueryBudgetExceeded(
+                        f"time budget of {self.query_budget['time']:g} s exceeded") from None
+                masks.append(np.unpackbits(bits, count=end - start).view(bool))
+                busy += seconds
+            wall = time.perf_counter() - began
+            step["report"] = (f"{len(partitions)} partitions in parallel, {wall * 1000:.0f} ms, "
+                              f"{busy * 1000:.0f} ms of worker CPU time, "
+                              f"utilization {busy / (wall * len(partitions)) if wall else 1:.0%}")
+            return np.concatenate(masks)
+        return parallel_plan
+
+    def compile_query(self, node, depth=0):
+        """
+        Compile a syntax tree into a plan: a function returning a boolean
+        mask over the product rows, or over `rows` when it is given. Every
+        step records its estimated and actual cardinality in plan_steps.
+
+        Subexpressions found in the query cache are answered from it, and
+        other results over the full catalog (except single terms, which are
+        read straight from postings) are added to it.
+        """
+        step = {"label": self.describe_node(node), "depth": depth, "cached": False,
+                "estimate": self.estimate_rows(node), "actual": None, "input": None,
+                "report": None}
+        self.plan_steps.append(step)
+        plan = self.compile_node(node, depth)
+        if self.uses_process_pool(node):
+            plan = self.compile_parallel(node, plan, step)
+        cacheable = node[0] not in ("term", "empty")
+
+        def recorded_plan(rows=None):
+            mask = self.cached_query_result(node) if cacheable else None
+            if mask is not None:
+                step["cached"] = True
+                if rows is not None:
+                    mask = mask[rows]
+            else:
+                self.charge(self.mask_size(rows))
+                mask = plan(rows)
+                if cacheable and rows is None:
+                    self.cache_query_result(node, mask)
+            step["actual"] = int(np.count_nonzero(mask))
+            step["input"] = None if rows is None else len(rows)
+            return mask
+        return recorded_plan
+
+    def compile_node(self, node, depth):
+        """
+        Compile one node of the syntax tree. Term leaves read postings,
+        field and numeric leaves read their indexes or columns, and
+        operators combine the masks of their operands.
+
+        AND evaluates its most selective operand first and OR its least
+        selective one; once few rows remain undecided, later operands
+        only filter those rows. When a cached AND/OR covers some of the
+        operands, as after refining a query, it goes first; a cached first
+        operand is always narrowed by filtering its result.
+        """
+        kind = node[0]
+
+        if kind == "term":
+            term = node[1]
+
+            def term_plan(rows=None):
+                postings = self.term_postings.get(term, np.zeros(0, dtype=np.int32))
+                if rows is None:
+                    return self.rows_mask(postings)
+                if not len(postings):
+                    return np.zeros(len(rows), dtype=bool)
+                positions = np.minimum(np.searchsorted(postings, rows), len(postings) - 1)
+                return postings[positions] == rows
+            return term_plan
+
+        if kind == "range":
+            return self.compile_range_condition(*node[1:])
+
+        if kind == "empty":
+            return lambda rows=None: np.zeros(self.mask_size(rows), dtype=bool)
+
+        if kind == "field":
+            return self.compile_field_condition(*node[1:])
+
+        if kind == "not":
+            child = self.compile_query(node[1], depth + 1)
+            return lambda rows=None: ~child(rows)
+
+        operands = node[1]
+        subset = self.cached_subset(node)
+        if subset is not None:
+            operands = [operand for operand in operands if operand not in subset[1]]
+        # Predicate-only operands go to the process pool together
+        residual = [operand for operand in operands if self.is_residual(operand)]
+        if 1 < len(residual) < len(operands) and self.uses_process_pool((kind, tuple(residual))):
+            operands = [operand for operand in operands if operand not in residual]
+            operands.append((kind, tuple(residual)))
+        ordered = sorted(operands, key=self.estimate_rows, reverse=kind == "or")
+        if subset is not None:
+            ordered.insert(0, subset)
+        # A cached first operand is the previous step of a refined query
+        refining = ordered[0] in self.query_cache
+        children = [self.compile_query(child, depth + 1) for child in ordered]
+        # AND narrows the rows still True, OR the rows still False
+        keep = kind == "or"
+
+        def combined_plan(rows=None):
+            result = children[0](rows)
+            for child in children[1:]:
+                undecided = np.flatnonzero(result != keep)
+                if not len(undecided):
+                    break
+                if refining or len(undecided) * FILTER_RATIO < len(result):
+                    result[undecided] = child(undecided if rows is None else rows[undecided])
+                elif keep:
+                    result |= child(rows)
+                else:
+                    result &= child(rows)
+            return result
+        return combined_plan
+
+    def compile_field_condition(self, field, operator, value, negated):
+        """
+        Compile field-specific conditions.
+        Supports:
+        field:value (substring match),
+        field=value (exact match),
+        either negated with field:not <value>.
+        Substrings are answered from the field's trigram index and exact
+        values from its hash index, then expanded to rows through the
+        field's code array.
+        """
+        field = field.lower()
+        verdicts = None
+        if operator == ":":
+            # substring check
+            def value_ids():
+                return self.substring_value_ids(field, value)
         elif operator == "=":
-            return product_price == target
+            # exact check
+            def value_ids():
+                return self.field_exact[field].get(value, [])
         else:
-            return False
+            # By default, if unsupported operator for fields, match nothing
+            return lambda rows=None: np.zeros(self.mask_size(rows), dtype=bool)
+
+        def field_plan(rows=None):
+            nonlocal verdicts
+            if field not in self.field_values:
+                return np.zeros(self.mask_size(rows), dtype=bool)
+            if operator == ":" and rows is not None:
+                # As a filter, verify only the values of the given rows,
+                # each at most once per query
+                if verdicts is None:
+                    verdicts = self.substring_verdicts(field, value)
+                mask = self.substring_filter(field, value, verdicts, rows)
+            else:
+                mask = self.value_ids_mask(field, value_ids(), rows)
+            return ~mask if negated else mask
+        return field_plan
+
+    def compile_range_condition(self, field, low, high, include_low, include_high):
+        """
+        Compile numeric range conditions like:
+        price<100, price=199.99, weight>=2, rating:4..5
+        Over all products the matching rows form one slice of the sorted
+        index, found with two binary searches in O(log n + k); as a filter
+        the column values of the given rows are compared directly.
+        """
+        def range_plan(rows=None):
+            values = self.numeric_values.get(field)
+            if values is None:
+                return np.zeros(self.mask_size(rows), dtype=bool)
+
+            if rows is not None:
+                column = self.store.numeric[field][rows]
+                mask = ~np.isnan(column)  # Missing values match no range
+                if low is not None:
+                    mask &= column >= low if include_low else column > low
+                if high is not None:
+                    mask &= column <= high if include_high else column < high
+                return mask
+
+            start, end = 0, len(values)
+            if low is not None:
+                start = np.searchsorted(values, low, "left" if include_low else "right")
+            if high is not None:
+                end = np.searchsorted(values, high, "right" if include_high else "left")
+            return self.rows_mask(self.numeric_rows[field][start:end])
+        return range_plan
 
 
 def main():
@@ -328,6 +2021,7 @@ def main():
     root = tk.Tk()
     app = EcommerceSearchSystem(root)
     root.mainloop()
+    app.close()
 
 
 if __name__ == "__main__":
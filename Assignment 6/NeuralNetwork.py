@@ -1,9 +1,20 @@
 import os
 import random
 import re
+import time
 import tkinter as tk
+from collections import Counter
 from tkinter import ttk, messagebox
 
+import numpy as np
+
+# Training hyperparameters of the model built from the loaded folder
+TRAIN_EPOCHS = 10
+LEARNING_RATE = 0.01
+# The folders are a few dozen files, so small batches still give several
+# weight updates per epoch
+BATCH_SIZE = 2
+
 
 def is_noun(word, previous_word=None):
     domain_proper_nouns = {
@@ -71,93 +82,129 @@ def load_txt_files(folder_path):
 
 
 def build_vocabulary(documents):
+    # Maps every noun to its id, in sorted order of the nouns
     vocab = set()
     for doc in documents:
         vocab.update(doc["nouns"])
-    return sorted(list(vocab))
+    return {term: index for index, term in enumerate(sorted(vocab))}
 
 
 def create_bow_vector(document, vocabulary):
-    tokens = document.split()
-    vector = [0] * len(vocabulary)
-    for token in tokens:
-        if token in vocabulary:
-            index = vocabulary.index(token)
-            vector[index] += 1
-    return vector
+    # Sparse BoW vector: the ids of the nouns present and their counts
+    counts = Counter(vocabulary[token]
+                     for token in document.split() if token in vocabulary)
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    return indices, values
 
 
 def prepare_bow_vectors(documents, vocabulary):
     return [create_bow_vector(doc["text"], vocabulary) for doc in documents]
 
 
+def bow_matrix(bow_vectors, dim):
+    # Dense float32 rows for a batch of sparse BoW vectors
+    matrix = np.zeros((len(bow_vectors), dim), dtype=np.float32)
+    for row, (indices, counts) in enumerate(bow_vectors):
+        matrix[row, indices] = counts
+    return matrix
+
+
 class NeuralNetwork:
+    # Weights and activations are float32 NumPy arrays
     def __init__(self, input_dim, hidden_dim, output_dim):
-        self.W1 = [[random.uniform(-0.01, 0.01)
-                    for _ in range(hidden_dim)] for _ in range(input_dim)]
-        self.B1 = [0.0 for _ in range(hidden_dim)]
-        self.W2 = [[random.uniform(-0.01, 0.01) for _ in range(output_dim)]
-                   for _ in range(hidden_dim)]
-        self.B2 = [0.0 for _ in range(output_dim)]
+        self.W1 = np.random.uniform(-0.01, 0.01,
+                                    (input_dim, hidden_dim)).astype(np.float32)
+        self.B1 = np.zeros(hidden_dim, dtype=np.float32)
+        self.W2 = np.random.uniform(-0.01, 0.01,
+                                    (hidden_dim, output_dim)).astype(np.float32)
+        self.B2 = np.zeros(output_dim, dtype=np.float32)
 
     def relu(self, x):
-        return [max(0, xi) for xi in x]
+        return np.maximum(x, 0)
 
     def relu_derivative(self, x):
-        return [1 if xi > 0 else 0 for xi in x]
+        return (x > 0).astype(np.float32)
 
     def forward(self, x):
-        self.Z1 = [sum(x[i] * self.W1[i][j] for i in range(len(x))
-                       ) + self.B1[j] for j in range(len(self.B1))]
+        x = np.asarray(x, dtype=np.float32)
+        self.Z1 = x @ self.W1 + self.B1
         self.A1 = self.relu(self.Z1)
-        self.Z2 = [sum(self.A1[j] * self.W2[j][k]
-                       for j in range(len(self.A1))) + self.B2[k] for k in range(len(self.B2))]
+        self.Z2 = self.A1 @ self.W2 + self.B2
         return self.Z2
 
     def backward(self, x, y_true, y_pred, learning_rate):
-        dZ2 = y_pred - y_true
-        dW2 = [dZ2 * a1 for a1 in self.A1]
+        x = np.asarray(x, dtype=np.float32)
+        dZ2 = np.float32(y_pred - y_true)
+        dW2 = dZ2 * self.A1
         dB2 = dZ2
 
-        dA1 = [dZ2 * self.W2[j][0] for j in range(len(self.A1))]
-        dZ1 = [dA1[j] * self.relu_derivative([self.Z1[j]])[0]
-               for j in range(len(dA1))]
+        dA1 = dZ2 * self.W2[:, 0]
+        dZ1 = dA1 * self.relu_derivative(self.Z1)
 
-        dW1 = [[dZ1[j] * x[i] for j in range(len(dZ1))] for i in range(len(x))]
+        # A BoW vector is mostly zeros, so only the rows of W1 for the
+        # words present in x get a non-zero gradient
+        present = np.flatnonzero(x)
+        dW1 = np.outer(x[present], dZ1)
         dB1 = dZ1
 
-        for j in range(len(self.W2)):
-            for k in range(len(self.W2[0])):
-                self.W2[j][k] -= learning_rate * dW2[j]
-        for k in range(len(self.B2)):
-            self.B2[k] -= learning_rate * dB2
+        self.W2 -= learning_rate * dW2[:, np.newaxis]
+        self.B2 -= learning_rate * dB2
+
+        self.W1[present] -= learning_rate * dW1
+        self.B1 -= learning_rate * dB1
+
+    def backward_batch(self, X, y_true, y_pred, learning_rate):
+        # Same gradients as backward, for a batch of rows after
+        # forward(X), averaged over the batch before a single update
+        batch_size = len(X)
+        dZ2 = (y_pred - y_true).astype(np.float32)
+        dW2 = self.A1.T @ dZ2 / batch_size
+        dB2 = dZ2.mean()
+
+        dA1 = np.outer(dZ2, self.W2[:, 0])
+        dZ1 = dA1 * self.relu_derivative(self.Z1)
+
+        # Only words present in some row of the batch get a gradient
+        present = np.flatnonzero(X.any(axis=0))
+        dW1 = X[:, present].T @ dZ1 / batch_size
+        dB1 = dZ1.mean(axis=0)
+
+        self.W2 -= learning_rate * dW2[:, np.newaxis]
+        self.B2 -= learning_rate * dB2
 
-        for i in range(len(self.W1)):
-            for j in range(len(self.W1[0])):
-                self.W1[i][j] -= learning_rate * dW1[i][j]
-        for j in range(len(self.B1)):
-            self.B1[j] -= learning_rate * dB1[j]
+        self.W1[present] -= learning_rate * dW1
+        self.B1 -= learning_rate * dB1
 
 
-def train_model(model, X_train, y_train, epochs=50, learning_rate=0.01, gui=None):
+def train_model(model, X_train, y_train, epochs=50, learning_rate=0.01, gui=None,
+                batch_size=32, shuffle=True):
+    input_dim = model.W1.shape[0]
+    y_train = np.asarray(y_train, dtype=np.float32)
     for epoch in range(1, epochs + 1):
+        started = time.perf_counter()
+        order = np.random.permutation(len(X_train)) if shuffle else np.arange(len(X_train))
         total_loss = 0.0
-        for x, y_true in zip(X_train, y_train):
-            y_pred = model.forward(x)[0]
-            loss = (y_pred - y_true) ** 2
-            total_loss += loss
-            model.backward(x, y_true, y_pred, learning_rate)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x = bow_matrix([X_train[i] for i in batch], input_dim)
+            y_true = y_train[batch]
+            y_pred = model.forward(x)[:, 0]
+            total_loss += float(((y_pred - y_true) ** 2).sum())
+            model.backward_batch(x, y_true, y_pred, learning_rate)
         avg_loss = total_loss / len(X_train)
+        samples_per_sec = len(X_train) / (time.perf_counter() - started)
         if gui:
-            gui.update_training_status(epoch, avg_loss)
+            gui.update_training_status(epoch, avg_loss, samples_per_sec)
 
 
 def query_model(model, query, vocabulary, documents, bow_vectors):
     query_nouns = tokenize_nouns(query)
     query_text = ' '.join(query_nouns)
-    query_vector = create_bow_vector(query_text, vocabulary)
-    scores = [sum(query_vector[j] * bow_vectors[i][j] for j in range(len(query_vector)))
-              for i in range(len(bow_vectors))]
+    query_vector = bow_matrix(
+        [create_bow_vector(query_text, vocabulary)], len(vocabulary))[0]
+    scores = [float(query_vector[indices] @ counts)
+              for indices, counts in bow_vectors]
     ranked_docs = sorted(zip(documents, scores),
                          key=lambda x: x[1], reverse=True)
     return ranked_docs[:5]
@@ -173,7 +220,7 @@ class Application:
         self.root.geometry("800x600")
 
         self.documents = []
-        self.vocabulary = []
+        self.vocabulary = {}
         self.bow_vectors = []
         self.model = None
 
@@ -249,16 +296,20 @@ class Application:
             self.model = NeuralNetwork(
                 input_dim=input_dim, hidden_dim=10, output_dim=1)
             train_model(self.model, X_train, y_train,
-                        epochs=10, learning_rate=0.01, gui=self)
+                        epochs=TRAIN_EPOCHS, learning_rate=LEARNING_RATE, gui=self,
+                        batch_size=BATCH_SIZE, shuffle=True)
 
             messagebox.showinfo("Success", f"Loaded {len(
                 self.documents)} documents and trained the model.")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {e}")
 
-    def update_training_status(self, epoch, loss):
+    def update_training_status(self, epoch, loss, samples_per_sec=None):
+        status = f"Epoch {epoch}, Loss: {loss:.4f}"
+        if samples_per_sec is not None:
+            status += f", {samples_per_sec:.0f} samples/sec"
         self.training_box.config(state='normal')
-        self.training_box.insert(tk.END, f"Epoch {epoch}, Loss: {loss:.4f}\n")
+        self.training_box.insert(tk.END, f"{status}\n")
         self.training_box.see(tk.END)
         self.training_box.config(state='disabled')
 